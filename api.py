@@ -0,0 +1,137 @@
+import gzip
+
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy.orm import load_only
+
+from models import InternshipForm, SERIALIZED_FIELDS
+from pagination import paginate_forms, InvalidCursor
+
+
+class ApiError(ValueError):
+    """Raised for invalid API parameters; reported as a 400 JSON response."""
+
+
+def parse_fields(value):
+    """Parse the `fields` parameter into a tuple of SERIALIZED_FIELDS.
+
+    Args:
+        value: Comma-separated field names, or None for all fields
+
+    Returns:
+        The requested fields in SERIALIZED_FIELDS order, always including 'id'
+
+    Raises:
+        ApiError: If a field name is unknown
+    """
+    if not value:
+        return SERIALIZED_FIELDS
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested.difference(SERIALIZED_FIELDS)
+    if unknown:
+        raise ApiError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    requested.add('id')
+    return tuple(name for name in SERIALIZED_FIELDS if name in requested)
+
+
+def parse_ids(value, limit):
+    """Parse the `ids` parameter into a list of unique ids, in request order.
+
+    Raises:
+        ApiError: If an id is not an integer or there are more than `limit`
+    """
+    ids, seen = [], set()
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            form_id = int(item)
+        except ValueError:
+            raise ApiError(f'Invalid id: {item}') from None
+        if form_id not in seen:
+            seen.add(form_id)
+            ids.append(form_id)
+    if len(ids) > limit:
+        raise ApiError(f'At most {limit} ids per request')
+    return ids
+
+
+def _columns(fields):
+    return [getattr(InternshipForm, name) for name in fields]
+
+
+def api_response(payload, status=200):
+    """Serialize `payload` as JSON, gzip-compressed when the client accepts it.
+
+    Small bodies are sent as is: below API_GZIP_MIN_SIZE bytes the gzip
+    header costs more than it saves.
+    """
+    response = jsonify(payload)
+    response.status_code = status
+    response.vary.add('Accept-Encoding')
+    if (request.accept_encodings['gzip']
+            and response.content_length >= current_app.config['API_GZIP_MIN_SIZE']):
+        response.set_data(gzip.compress(response.get_data(), compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def register_api(app):
+    """Register the versioned JSON API under /api/v1.
+
+    Args:
+        app: The Flask application instance
+    """
+    @app.errorhandler(ApiError)
+    def api_error(exc):
+        return api_response({'error': str(exc)}, 400)
+
+    @app.route('/api/v1/forms')
+    def api_list_forms():
+        """Return submissions as JSON, either by id or one keyset page at a time.
+
+        Parameters: `ids` (comma-separated, returned in that order), `fields`
+        (comma-separated subset of the form fields), and for listings `limit`
+        and `after` (the `next_cursor` of the previous page).
+        """
+        fields = parse_fields(request.args.get('fields'))
+
+        if 'ids' in request.args:
+            ids = parse_ids(request.args['ids'], app.config['API_MAX_IDS'])
+            forms = {}
+            if ids:
+                query = InternshipForm.query.options(load_only(*_columns(fields)))
+                forms = {form.id: form for form in query.filter(InternshipForm.id.in_(ids))}
+            return api_response({
+                'data': [forms[form_id].to_dict(fields) for form_id in ids if form_id in forms],
+                'missing': [form_id for form_id in ids if form_id not in forms],
+            })
+
+        limit = request.args.get('limit', app.config['API_DEFAULT_LIMIT'], type=int)
+        limit = max(1, min(limit, app.config['API_MAX_LIMIT']))
+        # The cursor is built from the boundary row's (created_at, id)
+        columns = _columns(set(fields) | {'id', 'created_at'})
+        try:
+            page = paginate_forms(InternshipForm.query, per_page=limit,
+                                  after=request.args.get('after'), columns=columns)
+        except InvalidCursor:
+            raise ApiError('Invalid cursor') from None
+
+        next_url = None
+        if page.has_next:
+            next_url = url_for('api_list_forms', after=page.next_cursor, limit=limit,
+                               fields=request.args.get('fields') or None)
+        return api_response({
+            'data': [form.to_dict(fields) for form in page.items],
+            'next_cursor': page.next_cursor,
+            'next': next_url,
+        })
+
+    @app.route('/api/v1/forms/<int:form_id>')
+    def api_get_form(form_id):
+        """Return one submission as JSON; supports the `fields` parameter."""
+        fields = parse_fields(request.args.get('fields'))
+        form = InternshipForm.query.options(load_only(*_columns(fields))).filter_by(id=form_id).first()
+        if form is None:
+            return api_response({'error': 'Not found'}, 404)
+        return api_response({'data': form.to_dict(fields)})
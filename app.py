@@ -1,11 +1,41 @@
+import io
 import os
-from flask import Flask, render_template, redirect, url_for, flash, request, session
+import secrets
+from flask import (Flask, render_template, redirect, url_for, flash, request, session, abort,
+                   jsonify, Response, stream_with_context, send_file)
 from flask_sqlalchemy import SQLAlchemy
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 from config import config_by_name
-from models import db, InternshipForm
+from models import db, InternshipForm, FormReview
 from forms import InternshipFormSubmission
+from pagination import paginate_forms, InvalidCursor
+from search import search_forms
+from archive import get_form_or_404, search_archive
+from commands import register_commands
+from auth import admin_required
+from cache import response_cache, cached_page, make_etag
+from database import init_database
+from instrumentation import init_instrumentation
+from jobs import init_jobs, enqueue, wake_worker
+from assets import init_assets
+from stats import dashboard
+from api import register_api
+from ratelimit import init_ratelimit, rate_limited
+from templating import init_templates, form_cards
+from review import register_review
+from dedupe import find_duplicate
+from tasks import enqueue_submission_jobs, load_form_pdf, form_pdf_path
+
+# Request content types accepted by the bulk import endpoint
+IMPORT_MIMETYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/json': 'json',
+}
 
 def create_app(config_name='development'):
     """Factory function to create and configure the Flask application.
@@ -21,12 +51,26 @@ def create_app(config_name='development'):
     # Load configuration from config.py
     app.config.from_object(config_by_name[config_name])
     
+    # Behind a reverse proxy, take the client address (used by the rate
+    # limits) from X-Forwarded-For
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+    
     # Initialize extensions with the app
-    db.init_app(app)
+    init_database(app)
+    response_cache.init_app(app)
+    init_instrumentation(app)
+    init_jobs(app)
+    init_assets(app)
+    init_ratelimit(app)
+    init_templates(app)
     
-    # Create database tables if they don't exist
-    with app.app_context():
-        db.create_all()
+    # Create database tables if they don't exist. Production skips this
+    # schema inspection on every worker boot: the schema is managed with
+    # `flask upgrade-db` at deployment time instead.
+    if app.config['AUTO_CREATE_SCHEMA']:
+        with app.app_context():
+            db.create_all()
     
     # Register context processors
     @app.context_processor
@@ -34,8 +78,11 @@ def create_app(config_name='development'):
         """Inject the current datetime into templates."""
         return {'now': datetime.utcnow()}
     
-    # Register routes
+    # Register routes and CLI commands
     register_routes(app)
+    register_api(app)
+    register_review(app)
+    register_commands(app)
     
     return app
 
@@ -49,16 +96,25 @@ def register_routes(app):
     def index():
         """Home page route that displays the internship form."""
         form = InternshipFormSubmission()
+        form.submission_token.data = secrets.token_hex(16)
         return render_template('form.html', form=form, title='Formulaire de Stage')
     
     @app.route('/submit', methods=['POST'])
+    @rate_limited('submit')
     def submit_form():
         """Handle form submission and save to database."""
         form = InternshipFormSubmission()
         
         if form.validate_on_submit():
-            # Create new InternshipForm instance from form data
-            internship_form = InternshipForm(
+            # A replayed POST (double click, browser resubmission) carries the
+            # token of a form that was already saved: show that one again
+            token = form.submission_token.data or None
+            if token:
+                existing = InternshipForm.query.filter_by(submission_token=token).first()
+                if existing is not None:
+                    return redirect(url_for('form_success', form_id=existing.id))
+            
+            values = dict(
                 company_name=form.company_name.data,
                 company_address=form.company_address.data,
                 contact_phone=form.contact_phone.data,
@@ -79,10 +135,45 @@ def register_routes(app):
                 cannot_accept=form.cannot_accept.data,
                 signature_location=form.signature_location.data
             )
+            # Create new InternshipForm instance from form data
+            internship_form = InternshipForm(submission_token=token, **values)
+            
+            # The same company resubmitting the same offer is shown its recent
+            # form. The key fields are public, so the resubmission may only
+            # replace a form nobody has reviewed yet, and only when enabled.
+            duplicate = find_duplicate(internship_form, app.config['DUPLICATE_WINDOW_DAYS'])
+            if duplicate is not None:
+                pending = not duplicate.is_approved and duplicate.reviewed_at is None
+                if not (app.config['DUPLICATE_UPDATES_PENDING'] and pending):
+                    flash('Une fiche identique a déjà été soumise : elle n\'a pas été modifiée.', 'success')
+                    return redirect(url_for('form_success', form_id=duplicate.id))
+                for name, value in values.items():
+                    setattr(duplicate, name, value)
+                duplicate.is_approved = False
+                duplicate.reviewed_at = None
+                db.session.add(FormReview(form_id=duplicate.id, action='resubmit', reviewer='formulaire public',
+                                          note=f'Remplacée par une nouvelle soumission de {request.remote_addr}'))
+                enqueue('generate_form_pdf', form_id=duplicate.id)
+                db.session.commit()
+                wake_worker()
+                flash('Une fiche identique avait déjà été soumise : elle a été mise à jour.', 'success')
+                return redirect(url_for('form_success', form_id=duplicate.id))
             
-            # Save to database
-            db.session.add(internship_form)
-            db.session.commit()
+            # Save to database; notifications and the PDF copy are produced by
+            # background jobs committed in the same transaction
+            try:
+                db.session.add(internship_form)
+                db.session.flush()
+                enqueue_submission_jobs(internship_form.id)
+                db.session.commit()
+            except IntegrityError:
+                # A concurrent request with the same token won the race
+                db.session.rollback()
+                existing = InternshipForm.query.filter_by(submission_token=token).first() if token else None
+                if existing is None:
+                    raise
+                return redirect(url_for('form_success', form_id=existing.id))
+            wake_worker()
             
             flash('Formulaire de stage soumis avec succès!', 'success')
             return redirect(url_for('form_success', form_id=internship_form.id))
@@ -94,26 +185,155 @@ def register_routes(app):
     @app.route('/success/<int:form_id>')
     def form_success(form_id):
         """Display success page after form submission."""
-        form = InternshipForm.query.get_or_404(form_id)
-        return render_template('form_success.html', form=form, title='Soumission Réussie')
+        def render():
+            form = InternshipForm.query.get_or_404(form_id)
+            body = render_template('form_success.html', form=form, title='Soumission Réussie')
+            return body, make_etag('success', form.id, form.updated_at), form.updated_at
+        return cached_page(f'success:{form_id}', render)
     
     @app.route('/forms')
     def list_forms():
-        """Display a list of all submitted internship forms."""
-        forms = InternshipForm.query.order_by(InternshipForm.created_at.desc()).all()
-        return render_template('list_forms.html', forms=forms, title='Liste des Formulaires')
+        """Display one page of submitted internship forms, newest first.
+
+        When a `q` parameter is given, the best search matches are shown
+        instead, followed by matching archived forms if there is room.
+        """
+        query = request.args.get('q', '').strip()
+        after = request.args.get('after')
+        before = request.args.get('before')
+        per_page = request.args.get('per_page', app.config['FORMS_PER_PAGE'], type=int)
+        per_page = max(1, min(per_page, app.config['FORMS_MAX_PER_PAGE']))
+        
+        def render():
+            if query:
+                limit = app.config['SEARCH_RESULTS_LIMIT']
+                forms = search_forms(query, limit=limit)
+                forms += search_archive(query, limit=limit - len(forms))
+                body = render_template('list_forms.html', cards=form_cards(forms), page=None,
+                                       query=query, title='Liste des Formulaires')
+            else:
+                try:
+                    page = paginate_forms(InternshipForm.query, per_page=per_page,
+                                          after=after, before=before)
+                except InvalidCursor:
+                    abort(400)
+                body = render_template('list_forms.html', cards=form_cards(page.items), page=page,
+                                       per_page=per_page, query='', title='Liste des Formulaires')
+            return body, make_etag(body), None
+        
+        if query and not response_cache.caches_searches:
+            key = None
+        else:
+            key = response_cache.list_key(query, after, before, per_page)
+        return cached_page(key, render)
+    
+    @app.route('/forms/search')
+    def search_forms_api():
+        """Return ranked search results as JSON."""
+        query = request.args.get('q', '').strip()
+        limit = request.args.get('limit', app.config['SEARCH_RESULTS_LIMIT'], type=int)
+        limit = max(1, min(limit, app.config['SEARCH_RESULTS_LIMIT']))
+        forms = search_forms(query, limit=limit)
+        forms += search_archive(query, limit=limit - len(forms))
+        results = [
+            {
+                'id': form.id,
+                'company_name': form.company_name,
+                'contact_name': form.contact_name,
+                'contact_email': form.contact_email,
+                'internship_topic1': form.internship_topic1,
+                'created_at': form.created_at.isoformat() if form.created_at else None,
+                'url': url_for('view_form', form_id=form.id)
+            }
+            for form in forms
+        ]
+        return jsonify({'query': query, 'results': results})
+    
+    @app.route('/stats')
+    def stats():
+        """Display the submission statistics dashboard."""
+        figures = dashboard(weeks=app.config['STATS_WEEKS'], top_companies=app.config['STATS_TOP_COMPANIES'])
+        busiest_week = max((week['submissions'] for week in figures['weeks']), default=0)
+        return render_template('stats.html', stats=figures, busiest_week=busiest_week,
+                               title='Statistiques des Stages')
+    
+    @app.route('/stats.json')
+    def stats_api():
+        """Return the dashboard statistics as JSON."""
+        return jsonify(dashboard(weeks=app.config['STATS_WEEKS'], top_companies=app.config['STATS_TOP_COMPANIES']))
+    
+    @app.route('/forms/import', methods=['POST'])
+    @admin_required
+    def import_forms_api():
+        """Bulk import forms sent as the request body or a `file` upload."""
+        from importer import import_forms, IMPORT_FORMATS
+
+        upload = request.files.get('file')
+        fmt = request.args.get('format')
+        if not fmt and upload and upload.filename:
+            fmt = os.path.splitext(upload.filename)[1].lstrip('.').lower()
+        fmt = fmt or IMPORT_MIMETYPES.get(request.mimetype)
+        if fmt not in IMPORT_FORMATS:
+            return jsonify({'error': 'Unsupported or missing import format'}), 400
+
+        stream = io.TextIOWrapper(upload.stream if upload else request.stream,
+                                  encoding='utf-8-sig', newline='')
+        try:
+            result = import_forms(stream, fmt, batch_size=app.config['IMPORT_BATCH_SIZE'])
+        except ValueError as exc:
+            return jsonify({'error': f'Malformed input: {exc}'}), 400
+        return jsonify(result.to_dict())
+    
+    @app.route('/forms/export')
+    def export_forms():
+        """Stream all submissions as CSV, JSON Lines or XLSX.
+
+        Optional filters: `since` and `until` (YYYY-MM-DD, inclusive) on the
+        submission date, and `approved` (true/false).
+        """
+        from exporter import generate_export, parse_filters, ExportError, EXPORT_FORMATS
+
+        fmt = request.args.get('format', 'csv')
+        try:
+            body = generate_export(fmt, **parse_filters(request.args))
+        except ExportError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        filename = f"formulaires_stage_{datetime.utcnow():%Y%m%d}.{fmt}"
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
     
     @app.route('/forms/<int:form_id>')
     def view_form(form_id):
-        """Display details of a specific internship form."""
-        form = InternshipForm.query.get_or_404(form_id)
-        return render_template('view_form.html', form=form, title=f'Stage à {form.company_name}')
+        """Display details of a specific internship form, archived or not."""
+        def render():
+            form = get_form_or_404(form_id)
+            body = render_template('view_form.html', form=form, title=f'Stage à {form.company_name}')
+            return body, make_etag('form', form.id, form.updated_at), form.updated_at
+        return cached_page(f'form:{form_id}', render)
+    
+    @app.route('/forms/<int:form_id>/pdf')
+    def form_pdf_download(form_id):
+        """Download the PDF copy of a submission, generating it if needed."""
+        form = get_form_or_404(form_id)
+        load_form_pdf(form)
+        return send_file(form_pdf_path(form.id), mimetype='application/pdf',
+                         download_name=f'fiche-stage-{form.id}.pdf')
     
     @app.errorhandler(404)
     def page_not_found(e):
         """Handle 404 errors."""
         return render_template('404.html', title='Page Non Trouvée'), 404
     
+    @app.errorhandler(429)
+    def too_many_requests(e):
+        """Handle 429 errors, telling the client when to try again."""
+        headers = {'Retry-After': str(e.retry_after)} if e.retry_after is not None else {}
+        return render_template('429.html', title='Trop de Requêtes'), 429, headers
+    
     @app.errorhandler(500)
     def internal_server_error(e):
         """Handle 500 errors."""
@@ -0,0 +1,218 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from flask import abort, current_app
+from sqlalchemy import delete, insert, inspect, or_, select, text
+
+from models import db, InternshipForm, ArchivedForm, serialize_value
+from cache import response_cache
+from search import FTS_TABLE
+
+# Columns copied to the archived_forms index (card and statistics columns)
+INDEX_COLUMNS = tuple(column.name for column in ArchivedForm.__table__.columns
+                      if column.name not in ('year', 'archived_at'))
+
+# Columns searched by search_archive()
+ARCHIVE_SEARCH_COLUMNS = ('company_name', 'contact_name', 'contact_email', 'internship_topic1')
+
+# InternshipForm columns restored as datetimes when reading an archive
+_DATETIME_COLUMNS = tuple(column.name for column in InternshipForm.__table__.columns
+                          if isinstance(column.type, db.DateTime))
+
+
+class ArchiveError(RuntimeError):
+    """Raised when forms cannot be archived safely."""
+
+
+def archive_dir():
+    """Return the directory of the yearly archive files."""
+    return current_app.config.get('ARCHIVE_DIR') or os.path.join(current_app.instance_path, 'archive')
+
+
+def archive_path(year, directory=None):
+    """Return the archive file of the forms submitted in `year`."""
+    return os.path.join(directory or archive_dir(), f'forms-{year}.jsonl.gz')
+
+
+def _append_records(path, records):
+    """Append `records` to a gzip JSON Lines archive as one new gzip member.
+
+    A gzip file may hold several members, which readers decompress as one
+    stream, so an archive grows by appending without being rewritten. The
+    file is synced before the caller deletes the rows from the database.
+    """
+    lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    with open(path, 'ab') as handle:
+        handle.write(gzip.compress(lines.encode('utf-8')))
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def archive_forms(cutoff, batch_size=1000, directory=None):
+    """Move the forms submitted before `cutoff` to yearly archive files.
+
+    Forms are processed oldest first, one batch per transaction: the batch
+    is appended to the archive file of each year it spans, then indexed in
+    archived_forms and deleted from internship_forms. A run interrupted
+    between those steps leaves the batch in the table, so it is archived
+    again by the next run; readers keep the last copy of a record.
+
+    The rows are deleted with a Core statement, so the statistics keep
+    counting archived forms. The search index follows through its triggers.
+
+    Args:
+        cutoff: Forms with a created_at before this datetime are archived
+        batch_size: Forms moved per transaction
+        directory: Where the archive files are written (default: archive_dir())
+
+    Returns:
+        A {year: number of forms archived} dict
+
+    Raises:
+        ArchiveError: If the database would give archived ids to new forms
+    """
+    from schema import reuses_form_ids
+
+    if reuses_form_ids(db.session.connection()):
+        raise ArchiveError('internship_forms would reuse the ids of archived forms: '
+                           'run `flask upgrade-db` first')
+    directory = directory or archive_dir()
+    os.makedirs(directory, exist_ok=True)
+    table = InternshipForm.__table__
+    query = (select(table).where(table.c.created_at < cutoff)
+             .order_by(table.c.created_at, table.c.id).limit(batch_size))
+
+    archived = {}
+    while True:
+        rows = db.session.execute(query).mappings().all()
+        if not rows:
+            break
+        now = datetime.utcnow()
+        by_year = {}
+        for row in rows:
+            by_year.setdefault(row['created_at'].year, []).append(row)
+        try:
+            for year, year_rows in sorted(by_year.items()):
+                _append_records(archive_path(year, directory), [
+                    {name: serialize_value(value) for name, value in row.items()} for row in year_rows
+                ])
+            db.session.execute(insert(ArchivedForm.__table__), [
+                dict({name: row[name] for name in INDEX_COLUMNS}, year=row['created_at'].year, archived_at=now)
+                for row in rows
+            ])
+            db.session.execute(delete(table).where(table.c.id.in_([row['id'] for row in rows])))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for year, year_rows in by_year.items():
+            archived[year] = archived.get(year, 0) + len(year_rows)
+
+    if archived:
+        response_cache.invalidate_lists()
+    return archived
+
+
+def compact_database():
+    """Reclaim the space freed by archiving and refresh planner statistics.
+
+    VACUUM cannot run inside a transaction, so it uses an autocommit
+    connection. On SQLite it rewrites the whole file (and needs as much free
+    disk space); the search index is merged into fewer segments first.
+    """
+    db.session.close()
+    engine = db.engine
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if engine.dialect.name == 'sqlite':
+            if FTS_TABLE in inspect(engine).get_table_names():
+                connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+            connection.execute(text('VACUUM'))
+            connection.execute(text('ANALYZE'))
+        else:
+            connection.execute(text(f'VACUUM ANALYZE {InternshipForm.__tablename__}'))
+            connection.execute(text(f'ANALYZE {ArchivedForm.__tablename__}'))
+
+
+@lru_cache(maxsize=4)
+def _read_archive(path, mtime_ns, size):
+    """Return {form id: JSON line} for one archive file.
+
+    Cached per (path, mtime, size), so a file appended to by a later run is
+    read again. Later copies of a record replace earlier ones.
+    """
+    lines = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            lines[json.loads(line)['id']] = line
+    return lines
+
+
+def load_archived_form(form_id):
+    """Read an archived form back from its yearly archive file.
+
+    Returns:
+        A transient InternshipForm (not attached to the session), or None
+        if the form was never archived
+    """
+    year = db.session.execute(
+        select(ArchivedForm.year).where(ArchivedForm.id == form_id)
+    ).scalar_one_or_none()
+    if year is None:
+        return None
+    path = archive_path(year)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        current_app.logger.error('Archive file %s of form %s is missing', path, form_id)
+        return None
+    line = _read_archive(path, stat.st_mtime_ns, stat.st_size).get(form_id)
+    if line is None:
+        return None
+
+    record = json.loads(line)
+    for name in _DATETIME_COLUMNS:
+        if record.get(name):
+            record[name] = datetime.fromisoformat(record[name])
+    return InternshipForm(**record)
+
+
+def get_form_or_404(form_id):
+    """Return a form from internship_forms or, failing that, from the archives.
+
+    Raises:
+        NotFound: If the form is in neither
+    """
+    form = db.session.get(InternshipForm, form_id)
+    if form is None:
+        form = load_archived_form(form_id)
+    if form is None:
+        abort(404)
+    return form
+
+
+def search_archive(terms, limit=50):
+    """Search archived forms by company, contact and main topic.
+
+    Args:
+        terms: The raw search string; every term must match
+        limit: Maximum number of results
+
+    Returns:
+        A list of ArchivedForm rows, newest first; they carry the columns
+        used by the list cards
+    """
+    tokens = [t for t in re.split(r'\s+', terms.strip()) if t]
+    if not tokens or limit <= 0:
+        return []
+
+    query = ArchivedForm.query
+    for token in tokens:
+        pattern = f'%{token}%'
+        query = query.filter(or_(
+            *(getattr(ArchivedForm, column).ilike(pattern) for column in ARCHIVE_SEARCH_COLUMNS)
+        ))
+    return query.order_by(ArchivedForm.created_at.desc()).limit(limit).all()
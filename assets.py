@@ -0,0 +1,318 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+from flask import current_app, request, send_from_directory, url_for
+
+MANIFEST_NAME = 'manifest.json'
+# One year: hashed file names change whenever their content does
+IMMUTABLE_MAX_AGE = 31536000
+TEXT_EXTENSIONS = ('.css', '.js', '.svg', '.json')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg')
+# Precompressed variants, preferred in this order when the client accepts them
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _split_strings(source, quotes):
+    """Yield (is_string, text) chunks of CSS with comments removed.
+
+    String literals come out as separate chunks, so minifiers never touch them.
+    """
+    text = []
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char in quotes:
+            end = i + 1
+            while end < len(source) and source[end] != char:
+                end += 2 if source[end] == '\\' else 1
+            yield False, ''.join(text)
+            yield True, source[i:end + 1]
+            text = []
+            i = end + 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = len(source) if end == -1 else end + 2
+            text.append(' ')
+        else:
+            text.append(char)
+            i += 1
+    yield False, ''.join(text)
+
+
+def minify_css(source):
+    """Remove comments and redundant whitespace from a stylesheet.
+
+    Args:
+        source: The CSS text
+
+    Returns:
+        The minified CSS text
+    """
+    output = []
+    for is_string, chunk in _split_strings(source, '"\''):
+        if not is_string:
+            chunk = re.sub(r'\s+', ' ', chunk)
+            chunk = re.sub(r'\s*([{};,>])\s*', r'\1', chunk)
+            # `a :hover` differs from `a:hover`, so only the space after a colon goes
+            chunk = re.sub(r':\s+', ':', chunk).replace(';}', '}')
+        output.append(chunk)
+    return ''.join(output).strip()
+
+
+# A slash starts a regular expression literal when it follows one of these
+_REGEX_PREFIX = set('(,=:[!&|?{};+-*%<>~^') | {''}
+
+
+def minify_js(source):
+    """Remove comments, indentation and blank lines from a script.
+
+    Line breaks are kept so that automatic semicolon insertion is unaffected;
+    that keeps the transformation safe without a full JavaScript parser.
+    String, template and regular expression literals are copied unchanged,
+    including the line breaks and indentation inside template literals.
+
+    Args:
+        source: The JavaScript text
+
+    Returns:
+        The minified JavaScript text
+    """
+    # Each line is a list of (is_literal, text) pieces; only code breaks lines
+    lines = [[]]
+    code = []
+
+    def flush_code():
+        first, *rest = ''.join(code).split('\n')
+        lines[-1].append((False, first))
+        lines.extend([(False, part)] for part in rest)
+        code.clear()
+
+    previous = ''
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char in '"\'`' or (char == '/' and previous in _REGEX_PREFIX
+                              and not source.startswith(('//', '/*'), i)):
+            end = i + 1
+            in_class = False
+            while end < len(source):
+                current = source[end]
+                if current == '\\':
+                    end += 2
+                    continue
+                if char == '/' and current in '[]':
+                    in_class = current == '['
+                elif current == char and not in_class:
+                    break
+                end += 1
+            flush_code()
+            lines[-1].append((True, source[i:end + 1]))
+            previous = source[end:end + 1]
+            i = end + 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = len(source) if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = len(source) if end == -1 else end + 2
+            code.append(' ')
+        else:
+            code.append(char)
+            if not char.isspace():
+                previous = char
+            i += 1
+    flush_code()
+
+    output = []
+    for pieces in lines:
+        texts = [text for _, text in pieces]
+        if not pieces[0][0]:
+            texts[0] = texts[0].lstrip()
+        if not pieces[-1][0]:
+            texts[-1] = texts[-1].rstrip()
+        line = ''.join(texts)
+        if line:
+            output.append(line)
+    return '\n'.join(output)
+
+
+def _hashed_name(relative_path, data):
+    root, ext = os.path.splitext(relative_path)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:10]}{ext}'
+
+
+def _write(output_dir, relative_path, data):
+    path = os.path.join(output_dir, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as handle:
+        handle.write(data)
+
+
+def _compress(output_dir, relative_path, data):
+    """Write the gzip (and, if the brotli module is installed, brotli) variants."""
+    _write(output_dir, relative_path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    _write(output_dir, relative_path + '.br', brotli.compress(data, quality=11))
+
+
+def _image_variants(relative_path, data, max_width):
+    """Return {manifest key: bytes} for an image: a resized PNG/JPEG and a WebP copy.
+
+    Without Pillow the original image is used as is.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return {relative_path: data}
+
+    import io
+
+    root, ext = os.path.splitext(relative_path)
+    if ext.lower() in ('.svg', '.gif'):
+        return {relative_path: data}
+
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    if image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+
+    variants = {}
+    original = io.BytesIO()
+    if ext.lower() == '.png':
+        image.save(original, format='PNG', optimize=True)
+    else:
+        image.convert('RGB').save(original, format='JPEG', quality=85, optimize=True, progressive=True)
+    # Keep the source file when "optimizing" would make it bigger
+    variants[relative_path] = min(original.getvalue(), data, key=len)
+
+    webp = io.BytesIO()
+    image.save(webp, format='WEBP', quality=85, method=6)
+    variants[f'{root}.webp'] = webp.getvalue()
+    return variants
+
+
+def build_assets(source_dir, output_dir, image_max_width=200, clean=False):
+    """Minify, fingerprint and precompress the static files for production.
+
+    Stylesheets and scripts are minified, images are resized and re-encoded
+    (when Pillow is available), every file is written under a content-hashed
+    name and text files also get .gz/.br variants. Files from previous builds
+    are kept unless `clean` is set, so pages cached before a deployment keep
+    working.
+
+    Args:
+        source_dir: The static folder to read from
+        output_dir: Where the built files and manifest.json are written
+        image_max_width: Width in pixels images are scaled down to
+        clean: Remove the output directory first
+
+    Returns:
+        The manifest: a dict of source path -> built path, relative to output_dir
+    """
+    if clean and os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+
+    output_root = os.path.abspath(output_dir)
+    manifest = {}
+    for directory, subdirectories, filenames in os.walk(source_dir):
+        if os.path.abspath(directory) == output_root:
+            subdirectories[:] = []
+            continue
+        subdirectories[:] = [name for name in subdirectories
+                             if os.path.abspath(os.path.join(directory, name)) != output_root]
+        for filename in sorted(filenames):
+            path = os.path.join(directory, filename)
+            relative_path = os.path.relpath(path, source_dir).replace(os.sep, '/')
+            ext = os.path.splitext(filename)[1].lower()
+            with open(path, 'rb') as handle:
+                data = handle.read()
+
+            if ext == '.css':
+                outputs = {relative_path: minify_css(data.decode('utf-8')).encode('utf-8')}
+            elif ext == '.js':
+                outputs = {relative_path: minify_js(data.decode('utf-8')).encode('utf-8')}
+            elif ext in IMAGE_EXTENSIONS:
+                outputs = _image_variants(relative_path, data, image_max_width)
+            else:
+                continue
+
+            for key, content in outputs.items():
+                built = _hashed_name(key, content)
+                _write(output_dir, built, content)
+                if os.path.splitext(key)[1].lower() in TEXT_EXTENSIONS:
+                    _compress(output_dir, built, content)
+                manifest[key] = built
+
+    _write(output_dir, MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def assets_dir(app):
+    """Return the directory built assets are written to and served from."""
+    return app.config.get('ASSETS_DIR') or os.path.join(app.static_folder, 'dist')
+
+
+def load_manifest(app):
+    """(Re)load the asset manifest of `app`; an empty one means serve the sources."""
+    manifest = {}
+    path = os.path.join(assets_dir(app), MANIFEST_NAME)
+    if app.config.get('ASSETS_USE_MANIFEST') and os.path.exists(path):
+        with open(path, encoding='utf-8') as handle:
+            manifest = json.load(handle)
+    app.extensions['assets_manifest'] = manifest
+    return manifest
+
+
+def asset_url(filename):
+    """Return the URL of a static file, fingerprinted if it has been built.
+
+    Takes the same `filename` as url_for('static', filename=...), which it
+    falls back to when the file is not in the manifest.
+    """
+    built = current_app.extensions.get('assets_manifest', {}).get(filename)
+    if built is None:
+        return url_for('static', filename=filename)
+    return url_for('assets', filename=built)
+
+
+def has_asset(filename):
+    """Whether `filename` (e.g. an optional WebP variant) exists in the manifest."""
+    return filename in current_app.extensions.get('assets_manifest', {})
+
+
+def init_assets(app):
+    """Register the asset helpers and the route serving built assets.
+
+    Args:
+        app: The Flask application instance
+    """
+    load_manifest(app)
+    app.add_template_global(asset_url)
+    app.add_template_global(has_asset)
+
+    @app.route('/assets/<path:filename>')
+    def assets(filename):
+        """Serve a built asset, precompressed if possible, with far-future caching."""
+        directory = assets_dir(app)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        available = [(name, suffix) for name, suffix in ENCODINGS
+                     if os.path.isfile(os.path.join(directory, filename + suffix))]
+        encoding = next(((name, suffix) for name, suffix in available if request.accept_encodings[name]), None)
+
+        response = send_from_directory(directory, filename + (encoding[1] if encoding else ''),
+                                       mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding[0]
+        if available:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,29 @@
+import hmac
+from functools import wraps
+
+from flask import current_app, request, abort
+
+
+def admin_required(view):
+    """Restrict a view to callers presenting the configured ADMIN_TOKEN.
+
+    The token is sent as `Authorization: Bearer <token>`. When no token is
+    configured the protected endpoints are disabled entirely.
+
+    Args:
+        view: The view function to protect
+
+    Returns:
+        The wrapped view function
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        expected = current_app.config.get('ADMIN_TOKEN')
+        if not expected:
+            abort(403)
+
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode('utf-8'), expected.encode('utf-8')):
+            abort(401)
+        return view(*args, **kwargs)
+    return wrapped
@@ -0,0 +1,93 @@
+"""Measure bulk import throughput (rows/second) into a temporary SQLite file.
+
+With --database-url, rows are imported into that database instead (e.g. a
+scratch PostgreSQL database, where imports use COPY); its tables are dropped
+at the end of the run.
+
+Usage:
+    python benchmarks/bench_import.py [--rows 50000] [--format jsonl] [--batch-size 5000]
+        [--database-url postgresql://localhost/forms_bench]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_records(rows):
+    return [
+        {
+            'company_name': f'Entreprise {i}',
+            'company_address': '1 Avenue Cheikh Anta Diop, Dakar',
+            'contact_phone': '338250000',
+            'contact_email': f'contact{i}@entreprise.sn',
+            'contact_name': 'Awa Ndiaye',
+            'contact_position': 'DRH',
+            'internship_positions': str(i % 5),
+            'internship_topic1': 'Développement web',
+            'wants_meeting': 'oui' if i % 3 else 'non',
+            'created_at': f'20{10 + i % 10}-06-01T09:00:00',
+        }
+        for i in range(rows)
+    ]
+
+
+def serialize(records, fmt):
+    if fmt == 'jsonl':
+        return '\n'.join(json.dumps(r) for r in records)
+    if fmt == 'json':
+        return json.dumps(records)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(records[0]))
+    writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--format', dest='fmt', choices=['csv', 'jsonl', 'json'], default='jsonl')
+    parser.add_argument('--batch-size', type=int, help='default: IMPORT_BATCH_SIZE')
+    parser.add_argument('--database-url', help='scratch database to import into')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        from app import create_app
+        from importer import import_forms
+        from models import db
+
+        app = create_app('production')
+        payload = serialize(make_records(args.rows), args.fmt)
+
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            result = import_forms(io.StringIO(payload), args.fmt,
+                                  batch_size=args.batch_size or app.config['IMPORT_BATCH_SIZE'])
+            elapsed = time.perf_counter() - started
+            backend = db.engine.dialect.name
+            if args.database_url:
+                db.drop_all()
+            db.engine.dispose()
+
+    print(json.dumps({
+        'backend': backend,
+        'format': args.fmt,
+        'rows': args.rows,
+        'inserted': result.inserted,
+        'failed': result.failed,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(result.inserted / elapsed),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
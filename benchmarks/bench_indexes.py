@@ -0,0 +1,106 @@
+"""Show query plans and timings of the hot InternshipForm queries before and
+after `upgrade_schema` adds the indexes declared in models.py.
+
+Usage:
+    python benchmarks/bench_indexes.py [--rows 50000] [--repeat 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import seed_forms
+
+from flask import Flask
+from sqlalchemy import inspect, text
+
+from models import db, InternshipForm
+from schema import upgrade_schema
+
+# Queries issued by the application, as raw SQL so the plans are easy to read
+QUERIES = {
+    'list newest first': (
+        'SELECT id, created_at, company_name FROM internship_forms '
+        'ORDER BY created_at DESC, id DESC LIMIT 21'
+    ),
+    'list next page': (
+        'SELECT id, created_at, company_name FROM internship_forms '
+        'WHERE (created_at, id) < (:created_at, :id) '
+        'ORDER BY created_at DESC, id DESC LIMIT 21'
+    ),
+    'approved newest first': (
+        'SELECT id, created_at FROM internship_forms WHERE is_approved = 1 '
+        'ORDER BY created_at DESC LIMIT 21'
+    ),
+    'cannot accept newest first': (
+        'SELECT id, created_at FROM internship_forms WHERE cannot_accept = 1 '
+        'ORDER BY created_at DESC LIMIT 21'
+    ),
+    'by company name': (
+        'SELECT id FROM internship_forms WHERE company_name = :company_name'
+    ),
+}
+
+
+def drop_indexes():
+    """Drop the secondary indexes so the 'before' numbers reflect an old database."""
+    with db.engine.begin() as connection:
+        for index in inspect(db.engine).get_indexes(InternshipForm.__tablename__):
+            connection.execute(text(f'DROP INDEX {index["name"]}'))
+        connection.execute(text('ANALYZE'))
+
+
+def measure(repeat, params):
+    """Return {query name: (plan lines, mean milliseconds)}."""
+    results = {}
+    with db.engine.connect() as connection:
+        for name, sql in QUERIES.items():
+            plan = [row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}'), params)]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                connection.execute(text(sql), params).fetchall()
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            results[name] = (plan, elapsed)
+    return results
+
+
+def report(label, results):
+    print(f'\n== {label} ==')
+    for name, (plan, elapsed) in results.items():
+        print(f'{name:<28} {elapsed:8.3f} ms')
+        for line in plan:
+            print(f'    {line}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            seed_forms(args.rows)
+            drop_indexes()
+
+            middle = db.session.execute(text(
+                'SELECT created_at, id FROM internship_forms ORDER BY id LIMIT 1 OFFSET :n'
+            ), {'n': args.rows // 2}).one()
+            params = {'created_at': middle[0], 'id': middle[1], 'company_name': 'Company 7'}
+
+            report(f'before ({args.rows} rows, no secondary indexes)', measure(args.repeat, params))
+            for change in upgrade_schema():
+                print(f'upgrade: {change}')
+            report('after upgrade_schema', measure(args.repeat, params))
+
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Measure template compilation and submissions-list rendering times.
+
+Compilation is measured in fresh Jinja environments, with an empty and with
+a warm bytecode cache (what `flask templates-compile` provides to workers).
+List rendering times form_cards() plus the render of list_forms.html for
+unsaved synthetic forms, so no database is involved.
+
+Usage:
+    python benchmarks/bench_render.py --cards 1000 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+
+from common import synthetic_forms
+
+from flask import render_template
+
+# Templates a worker compiles on its first requests
+COLD_TEMPLATES = ('form.html', 'view_form.html', 'list_forms.html')
+
+
+def median_ms(function, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return round(statistics.median(times) * 1000, 2)
+
+
+def compile_ms(create_app, init_templates, cache_dir, repeat):
+    """Median time to load COLD_TEMPLATES in a new app (a new Jinja environment)."""
+    times = []
+    for _ in range(repeat):
+        app = create_app('production')
+        if cache_dir:
+            app.config.update(TEMPLATE_BYTECODE_CACHE=True, TEMPLATE_CACHE_DIR=cache_dir)
+            init_templates(app)
+        started = time.perf_counter()
+        for name in COLD_TEMPLATES:
+            app.jinja_env.get_template(name)
+        times.append(time.perf_counter() - started)
+    return round(statistics.median(times) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_render_')
+    cache_dir = os.path.join(workdir, 'jinja')
+    os.environ.update(DATABASE_URL=f'sqlite:///{os.path.join(workdir, "bench.db")}',
+                      SECRET_KEY=os.environ.get('SECRET_KEY', 'benchmark'),
+                      JOBS_IN_APP_WORKER='0', TEMPLATE_BYTECODE_CACHE='0')
+    try:
+        from app import create_app
+        from models import InternshipForm
+        from templating import compile_templates, form_cards, init_templates
+
+        report = {
+            'config': {
+                'repeat': args.repeat,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+            },
+            'compile_ms': {'no_cache': compile_ms(create_app, init_templates, None, args.repeat)},
+            'list_render_ms': {},
+        }
+
+        # Fill the cache as `flask templates-compile` does at deployment
+        warm = create_app('production')
+        warm.config.update(TEMPLATE_BYTECODE_CACHE=True, TEMPLATE_CACHE_DIR=cache_dir)
+        init_templates(warm)
+        compile_templates(warm)
+        report['compile_ms']['bytecode_cache'] = compile_ms(create_app, init_templates, cache_dir, args.repeat)
+
+        app = create_app('production')
+        for count in args.cards:
+            forms = [InternshipForm(id=i + 1, **row) for i, row in enumerate(synthetic_forms(count))]
+            with app.test_request_context('/forms'):
+                def render():
+                    render_template('list_forms.html', cards=form_cards(forms), page=None,
+                                    query='', title='Liste des Formulaires')
+                render()
+                elapsed = median_ms(render, args.repeat)
+            report['list_render_ms'][str(count)] = {
+                'total': elapsed,
+                'per_card_us': round(elapsed * 1000 / count, 1),
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""Load test the application routes against a local SQLite file.
+
+Seeds N synthetic submissions, starts the app in a separate process on a
+local port, drives `/`, `/submit`, `/forms` and `/forms/<id>` with
+concurrent clients, and writes throughput, latency percentiles and the
+server's peak RSS as JSON. With --thresholds, the run exits with status 1
+when a limit is exceeded, so it can gate changes in CI.
+
+Usage:
+    python benchmarks/bench_routes.py --rows 10000 --requests 500 --concurrency 8 \\
+        --output bench_output.json --thresholds benchmarks/thresholds.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from common import ROOT, seed_forms
+
+
+def serve(args):
+    """Run the application with a threaded WSGI server (child process)."""
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    app = create_app('production')
+    app.config['WTF_CSRF_ENABLED'] = False
+    make_server('127.0.0.1', args.port, app, threaded=True).serve_forever()
+
+
+def prepare_database(args):
+    """Create and seed the benchmark database; return the ids and a list cursor."""
+    from app import create_app
+    from models import db, InternshipForm
+    from pagination import paginate_forms
+
+    app = create_app('production')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed_forms(args.rows, seed=args.seed)
+        ids = [row[0] for row in db.session.query(InternshipForm.id).all()]
+        middle = paginate_forms(InternshipForm.query, per_page=max(args.rows // 2, 1))
+        cursor = middle.next_cursor
+        db.session.remove()
+        db.engine.dispose()
+    return ids, cursor
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('benchmark server did not start')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def submission(i):
+    return urlencode({
+        'company_name': f'Bench Company {i}',
+        'company_address': '1 Avenue Cheikh Anta Diop',
+        'contact_phone': '338250000',
+        'contact_email': f'bench{i}@example.com',
+        'contact_name': 'Awa Ndiaye',
+        'contact_position': 'DRH',
+        'internship_positions': '2',
+        'internship_topic1': 'Développement web',
+    })
+
+
+def scenarios(ids, cursor):
+    """Return {name: callable(i) -> (method, path, body)} for each route."""
+    rng = random.Random(7)
+    return {
+        'GET /': lambda i: ('GET', '/', None),
+        'POST /submit': lambda i: ('POST', '/submit', submission(i)),
+        'GET /forms': lambda i: ('GET', '/forms', None),
+        'GET /forms?after=': lambda i: ('GET', f'/forms?after={cursor}', None),
+        'GET /forms/<id>': lambda i: ('GET', f'/forms/{rng.choice(ids)}', None),
+    }
+
+
+def timed_request(port, method, path, body):
+    """Issue one request on a fresh connection; return (seconds, status)."""
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'} if body else {}
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        status = response.status
+    finally:
+        connection.close()
+    return time.perf_counter() - started, status
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(port, build, requests, concurrency):
+    expected = {200, 302}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda i: timed_request(port, *build(i)), range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for seconds, _ in results)
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, status in results if status not in expected),
+        'throughput_rps': round(requests / elapsed, 1),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1], 2),
+    }
+
+
+def check_thresholds(report, thresholds):
+    """Return a list of human-readable threshold violations."""
+    failures = []
+    for route, limits in thresholds.get('routes', {}).items():
+        result = report['routes'].get(route)
+        if result is None:
+            continue
+        for key, limit in limits.items():
+            if key == 'min_throughput_rps':
+                if result['throughput_rps'] < limit:
+                    failures.append(f'{route}: throughput {result["throughput_rps"]} < {limit} req/s')
+            elif key == 'max_errors':
+                if result['errors'] > limit:
+                    failures.append(f'{route}: {result["errors"]} errors > {limit}')
+            elif key.startswith('max_') and key.endswith('_ms'):
+                metric = key[len('max_'):]
+                if result[metric] > limit:
+                    failures.append(f'{route}: {metric} {result[metric]} ms > {limit} ms')
+
+    limit = thresholds.get('max_peak_rss_mb')
+    if limit is not None and report['server_peak_rss_mb'] is not None \
+            and report['server_peak_rss_mb'] > limit:
+        failures.append(f'server peak RSS {report["server_peak_rss_mb"]} MB > {limit} MB')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help='synthetic submissions to seed')
+    parser.add_argument('--requests', type=int, default=300, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per route')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file); '
+                                     'its tables are dropped and reseeded')
+    parser.add_argument('--force', action='store_true', help='allow --db to name an existing non-empty file')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--thresholds', help='JSON file of limits that fail the run')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+    if args.db and os.path.exists(args.db) and os.path.getsize(args.db) and not args.force:
+        parser.error(f'{args.db} exists and would be wiped; pass --force to reuse it')
+
+    workdir = tempfile.mkdtemp(prefix='bench_routes_')
+    db_path = os.path.abspath(args.db or os.path.join(workdir, 'bench.db'))
+    env = dict(os.environ,
+               DATABASE_URL=f'sqlite:///{db_path}',
+               SECRET_KEY=os.environ.get('SECRET_KEY', 'benchmark'),
+               MAIL_BACKEND='console',
+               FORM_PDF_DIR=os.path.join(workdir, 'pdfs'),
+               # The load comes from one address: measure the route, not the limiter
+               RATELIMIT_ENABLED=os.environ.get('RATELIMIT_ENABLED', '0'),
+               PYTHONPATH=ROOT)
+    os.environ.update(DATABASE_URL=env['DATABASE_URL'], SECRET_KEY=env['SECRET_KEY'])
+
+    ids, cursor = prepare_database(args)
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port)],
+        env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        routes = {}
+        for name, build in scenarios(ids, cursor).items():
+            for i in range(args.warmup):
+                timed_request(port, *build(-i - 1))
+            routes[name] = run_scenario(port, build, args.requests, args.concurrency)
+            print(f'{name:<20} {routes[name]["throughput_rps"]:>8} req/s  '
+                  f'p50 {routes[name]["p50_ms"]:>7} ms  p95 {routes[name]["p95_ms"]:>7} ms  '
+                  f'p99 {routes[name]["p99_ms"]:>7} ms  errors {routes[name]["errors"]}',
+                  file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.db:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # ru_maxrss of waited-for children: kilobytes on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    divisor = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+
+    report = {
+        'config': {
+            'rows': args.rows,
+            'requests_per_route': args.requests,
+            'concurrency': args.concurrency,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'routes': routes,
+        'server_peak_rss_mb': round(max_rss / divisor, 1),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
+
+    if args.thresholds:
+        with open(args.thresholds) as handle:
+            failures = check_thresholds(report, json.load(handle))
+        for failure in failures:
+            print(f'THRESHOLD EXCEEDED: {failure}', file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
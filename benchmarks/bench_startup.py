@@ -0,0 +1,142 @@
+"""Measure application startup: module import time and create_app() time.
+
+Each measurement runs in a fresh interpreter, as a Gunicorn worker or a test
+session would. Import times come from `python -X importtime`; the report
+lists the slowest modules and checks that modules only needed by background
+jobs, exports, imports or CLI commands are not loaded by `import app`. With
+--thresholds, the run exits with status 1 when the `startup` budget is
+exceeded.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --thresholds benchmarks/thresholds.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import ROOT
+
+# Modules that `import app` must not load: they are imported on first use
+DEFERRED_MODULES = (
+    'cProfile',
+    'exporter',
+    'importer',
+    'mail',
+    'openpyxl',
+    'pdf',
+    'schema',
+    'smtplib',
+)
+
+CREATE_APP_SCRIPT = """
+import sys, time, json
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app(sys.argv[1])
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'loaded': sorted(name for name in sys.argv[2:] if name in sys.modules),
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def project_modules():
+    """Names of the application's own top-level modules."""
+    return {name[:-3] for name in os.listdir(ROOT) if name.endswith('.py')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per measurement')
+    parser.add_argument('--config', default='production', help='configuration passed to create_app')
+    parser.add_argument('--top', type=int, default=10, help='slowest modules to report')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--thresholds', help='JSON file whose "startup" limits fail the run')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    env = dict(os.environ,
+               DATABASE_URL=f'sqlite:///{os.path.join(workdir, "bench.db")}',
+               SECRET_KEY=os.environ.get('SECRET_KEY', 'benchmark'),
+               PYTHONPATH=ROOT)
+
+    timings = []
+    trace = None
+    try:
+        for _ in range(args.runs):
+            completed = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', CREATE_APP_SCRIPT, args.config, *DEFERRED_MODULES],
+                env=env, cwd=ROOT, capture_output=True, text=True, check=True
+            )
+            timings.append(json.loads(completed.stdout))
+            trace = parse_importtime(completed.stderr)
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+    own = project_modules()
+    report = {
+        'config': {
+            'runs': args.runs,
+            'app_config': args.config,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'import_ms': round(statistics.median(t['import_ms'] for t in timings), 1),
+        'create_app_ms': round(statistics.median(t['create_app_ms'] for t in timings), 1),
+        'app_module_self_ms': {
+            name: round(self_us / 1000, 1)
+            for name, (self_us, _) in sorted(trace.items(), key=lambda item: -item[1][0])
+            if name in own
+        },
+        'slowest_modules_ms': {
+            name: round(cumulative_us / 1000, 1)
+            for name, (_, cumulative_us) in sorted(trace.items(), key=lambda item: -item[1][1])[:args.top]
+        },
+        'eagerly_loaded': timings[-1]['loaded'],
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
+
+    if args.thresholds:
+        with open(args.thresholds) as handle:
+            limits = json.load(handle).get('startup', {})
+        failures = []
+        for key in ('import_ms', 'create_app_ms'):
+            limit = limits.get(f'max_{key}')
+            if limit is not None and report[key] > limit:
+                failures.append(f'{key} {report[key]} > {limit}')
+        if report['eagerly_loaded']:
+            failures.append(f'modules loaded at import time: {", ".join(report["eagerly_loaded"])}')
+        for failure in failures:
+            print(f'THRESHOLD EXCEEDED: {failure}', file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
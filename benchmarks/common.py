@@ -0,0 +1,47 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def synthetic_forms(rows, seed=42, start=datetime(2020, 1, 1)):
+    """Yield `rows` reproducible InternshipForm column dicts, one minute apart."""
+    rng = random.Random(seed)
+    companies = max(rows // 10, 1)
+    for i in range(rows):
+        created_at = start + timedelta(minutes=i)
+        yield {
+            'created_at': created_at,
+            'updated_at': created_at,
+            'company_name': f'Company {rng.randrange(companies)}',
+            'company_address': '1 Avenue Cheikh Anta Diop, Dakar',
+            'contact_phone': '338250000',
+            'contact_email': f'contact{i}@example.com',
+            'contact_name': 'Awa Ndiaye',
+            'contact_position': 'DRH',
+            'internship_positions': rng.randrange(1, 6),
+            'internship_topic1': rng.choice(['Développement web', 'Réseaux', 'Data engineering']),
+            'is_approved': rng.random() < 0.3,
+            'cannot_accept': rng.random() < 0.1,
+            'wants_meeting': rng.random() < 0.5,
+        }
+
+
+def seed_forms(rows, batch_size=5000, seed=42):
+    """Insert synthetic submissions with batched Core INSERTs (app context required)."""
+    from models import db, InternshipForm
+
+    batch = []
+    for row in synthetic_forms(rows, seed=seed):
+        batch.append(row)
+        if len(batch) == batch_size:
+            db.session.execute(InternshipForm.__table__.insert(), batch)
+            batch.clear()
+    if batch:
+        db.session.execute(InternshipForm.__table__.insert(), batch)
+    db.session.commit()
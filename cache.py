@@ -0,0 +1,294 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context, request, session, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import InternshipForm
+
+# Cache key of the list generation (see ResponseCache)
+GENERATION_KEY = 'list:generation'
+
+
+class NullCache:
+    """Backend that never stores anything (caching disabled)."""
+
+    caches_searches = False
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with a per-entry time to live.
+
+    Each worker process has its own copy, so an invalidation in one worker
+    is only seen by the others once their entries expire.
+    """
+
+    # Search pages only ever displace other entries of a bounded LRU
+    caches_searches = True
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemCache:
+    """Cache storing one pickle file per key in a directory.
+
+    The directory can be shared by several worker processes on the same
+    host, which makes invalidations visible to all of them immediately.
+
+    Files are not deleted when they expire or when a generation bump
+    orphans them: set() sweeps the expired files at most once per `ttl`,
+    and deletes the oldest files whenever there are more than
+    `max_entries`. The files of the keys in `pinned` are only deleted once
+    expired. Free-text search pages are not cached by this backend, as
+    every new query would add a file.
+    """
+
+    caches_searches = False
+
+    # Prefix of the files being written, which pruning leaves alone
+    TEMP_PREFIX = '.tmp-'
+
+    def __init__(self, directory, ttl=300, max_entries=1024, pinned=()):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._pinned = {self._path(key) for key in pinned}
+        self._next_sweep = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                return None
+            with open(path, 'rb') as cached:
+                return pickle.load(cached)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def set(self, key, value):
+        # Write to a temporary file first so readers never see partial data
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=self.TEMP_PREFIX)
+        with os.fdopen(fd, 'wb') as tmp:
+            pickle.dump(value, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._prune()
+
+    def _prune(self):
+        """Delete expired files, then the oldest ones beyond max_entries."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if not entry.name.startswith(self.TEMP_PREFIX)]
+        except OSError:
+            return
+        now = time.time()
+        if len(entries) <= self.max_entries and now < self._next_sweep:
+            return
+        self._next_sweep = now + self.ttl
+
+        remaining = len(entries)
+        live = []
+        for entry in entries:
+            try:
+                mtime = entry.stat().st_mtime
+                if mtime + self.ttl < now:
+                    os.remove(entry.path)
+                    remaining -= 1
+                elif entry.path not in self._pinned:
+                    live.append((mtime, entry.path))
+            except OSError:
+                pass
+        live.sort()
+        for _, path in live[:max(0, remaining - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class ResponseCache:
+    """Cache of rendered pages for the read-only views.
+
+    Entries are keyed by form id (`form:<id>`, `success:<id>`) or by list
+    page. List keys embed a generation number stored in the cache itself;
+    any write bumps the generation, which retires every cached list page
+    at once without having to enumerate them.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the cache backend selected by RESPONSE_CACHE_TYPE for `app`."""
+        backend = app.config.get('RESPONSE_CACHE_TYPE', 'memory')
+        ttl = app.config.get('RESPONSE_CACHE_TTL', 300)
+        if backend == 'memory':
+            store = MemoryCache(app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024), ttl)
+        elif backend == 'filesystem':
+            store = FileSystemCache(
+                app.config.get('RESPONSE_CACHE_DIR') or os.path.join(app.instance_path, 'cache'), ttl,
+                app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024), pinned=(GENERATION_KEY,)
+            )
+        elif backend == 'null':
+            store = NullCache()
+        else:
+            raise ValueError(f'Unknown RESPONSE_CACHE_TYPE: {backend}')
+        app.extensions['response_cache'] = store
+
+    @property
+    def store(self):
+        return current_app.extensions['response_cache']
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value):
+        self.store.set(key, value)
+
+    @property
+    def caches_searches(self):
+        """Whether pages of free-text search results should be cached."""
+        return self.store.caches_searches
+
+    def list_key(self, *parts):
+        """Build the cache key of a list page for the current generation."""
+        generation = self.store.get(GENERATION_KEY) or 0
+        return ':'.join(['list', str(generation)] + [str(p) for p in parts])
+
+    def invalidate_lists(self):
+        """Retire every cached list page."""
+        self.store.set(GENERATION_KEY, time.time_ns())
+
+    def invalidate_form(self, form_id):
+        """Drop the cached pages of one form and every list page."""
+        self.store.delete(f'form:{form_id}')
+        self.store.delete(f'success:{form_id}')
+        self.invalidate_lists()
+
+
+response_cache = ResponseCache()
+
+
+def make_etag(*parts):
+    """Return a short, stable entity tag for the given values."""
+    return hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()[:20]
+
+
+def cached_page(key, render):
+    """Serve a page from the response cache, rendering it on a miss.
+
+    Args:
+        key: The cache key, or None to bypass the cache
+        render: Callable returning (body, etag, last_modified)
+
+    Returns:
+        A Response answering conditional requests with 304 Not Modified
+    """
+    # Pages rendered while flash messages are pending embed (and consume)
+    # those messages, so they are neither served from nor stored in the cache
+    if session.get('_flashes'):
+        key = None
+
+    entry = response_cache.get(key) if key is not None else None
+    if entry is None:
+        body, etag, last_modified = render()
+        entry = {'body': body, 'etag': etag, 'last_modified': last_modified}
+        if key is not None:
+            response_cache.set(key, entry)
+
+    response = Response(entry['body'], mimetype='text/html')
+    response.set_etag(entry['etag'])
+    if entry['last_modified'] is not None:
+        response.last_modified = entry['last_modified']
+    # Browsers may keep the page but must revalidate it on each visit
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@event.listens_for(InternshipForm, 'after_insert')
+@event.listens_for(InternshipForm, 'after_update')
+@event.listens_for(InternshipForm, 'after_delete')
+def _remember_changed_form(mapper, connection, target):
+    """Record forms written in this session; they are invalidated on commit."""
+    db_session = Session.object_session(target)
+    if db_session is not None:
+        db_session.info.setdefault('changed_form_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_forms(db_session):
+    form_ids = db_session.info.pop('changed_form_ids', None)
+    if form_ids and has_app_context() and 'response_cache' in current_app.extensions:
+        for form_id in form_ids:
+            response_cache.invalidate_form(form_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_forms(db_session):
+    db_session.info.pop('changed_form_ids', None)
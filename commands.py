@@ -0,0 +1,168 @@
+import os
+
+import click
+
+
+def register_commands(app):
+    """Register the application's Flask CLI commands.
+
+    Args:
+        app: The Flask application instance
+    """
+    @app.cli.command('search-rebuild')
+    def search_rebuild_command():
+        """Create the full-text search index if needed and reindex all forms."""
+        from search import rebuild_search_index
+
+        rebuild_search_index()
+        click.echo('Search index rebuilt.')
+
+    @app.cli.command('stats-rebuild')
+    def stats_rebuild_command():
+        """Recompute the statistics dashboard counters from all forms."""
+        from stats import rebuild_stats
+
+        count = rebuild_stats()
+        click.echo(f'Statistics rebuilt from {count} forms.')
+
+    @app.cli.command('dedupe-forms')
+    @click.option('--delete', is_flag=True,
+                  help='Delete the duplicates, keeping the reviewed or else the oldest form of each group.')
+    def dedupe_forms_command(delete):
+        """Find submissions that duplicate one sent within DUPLICATE_WINDOW_DAYS."""
+        from dedupe import backfill_dedupe_keys, duplicate_groups
+        from models import db, InternshipForm
+
+        backfilled = backfill_dedupe_keys()
+        if backfilled:
+            click.echo(f'Computed the duplicate key of {backfilled} forms.')
+
+        groups = duplicate_groups(app.config['DUPLICATE_WINDOW_DAYS'])
+        for kept, ids in groups:
+            click.echo(f'  form {kept} duplicated by {", ".join(map(str, ids))}')
+        duplicates = sum(len(ids) for _, ids in groups)
+
+        if delete and duplicates:
+            # ORM deletes, so the statistics and cached pages follow
+            for _, ids in groups:
+                for form in InternshipForm.query.filter(InternshipForm.id.in_(ids)):
+                    db.session.delete(form)
+            db.session.commit()
+            click.echo(f'{duplicates} duplicates deleted.')
+        else:
+            click.echo(f'{duplicates} duplicates in {len(groups)} groups.')
+
+    @app.cli.command('upgrade-db')
+    @click.option('--no-analyze', is_flag=True, help='Skip refreshing planner statistics.')
+    def upgrade_db_command(no_analyze):
+        """Add missing tables, columns and indexes without dropping data."""
+        from schema import upgrade_schema, SchemaUpgradeError
+
+        try:
+            changes = upgrade_schema(analyze=not no_analyze)
+        except SchemaUpgradeError as exc:
+            raise click.ClickException(str(exc))
+        for change in changes:
+            click.echo(f'  - {change}')
+        click.echo('Database upgraded.' if changes else 'Database schema already up to date.')
+
+    @app.cli.command('import-forms')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl', 'json']),
+                  help='Input format (default: guessed from the file extension).')
+    @click.option('--batch-size', type=int, default=None, help='Rows per transaction.')
+    @click.option('--dry-run', is_flag=True, help='Validate records without inserting them.')
+    def import_forms_command(path, fmt, batch_size, dry_run):
+        """Bulk import internship forms from a CSV, JSON Lines or JSON file."""
+        from importer import import_forms
+
+        fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt == 'ndjson':
+            fmt = 'jsonl'
+        if fmt not in ('csv', 'jsonl', 'json'):
+            raise click.BadParameter('cannot guess the format, use --format', param_hint='--format')
+
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            result = import_forms(
+                stream, fmt,
+                batch_size=batch_size or app.config['IMPORT_BATCH_SIZE'],
+                dry_run=dry_run
+            )
+
+        for number, errors in result.errors:
+            details = '; '.join(f'{field}: {", ".join(messages)}' for field, messages in errors.items())
+            click.echo(f'record {number}: {details}', err=True)
+        verb = 'validated' if dry_run else 'imported'
+        click.echo(f'{result.inserted} forms {verb}, {result.failed} rejected.')
+
+    @app.cli.command('archive-forms')
+    @click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']),
+                  help='Archive forms submitted before this date (default: ARCHIVE_AFTER_DAYS ago).')
+    @click.option('--no-vacuum', is_flag=True, help='Skip VACUUM and ANALYZE afterwards.')
+    def archive_forms_command(before, no_vacuum):
+        """Move old submissions to compressed yearly archive files."""
+        from datetime import datetime, timedelta
+        from archive import ArchiveError, archive_dir, archive_forms, compact_database
+
+        cutoff = before or datetime.utcnow() - timedelta(days=app.config['ARCHIVE_AFTER_DAYS'])
+        try:
+            archived = archive_forms(cutoff, batch_size=app.config['ARCHIVE_BATCH_SIZE'])
+        except ArchiveError as exc:
+            raise click.ClickException(str(exc))
+        for year, count in sorted(archived.items()):
+            click.echo(f'  {year}: {count} forms')
+        click.echo(f'{sum(archived.values())} forms submitted before {cutoff:%Y-%m-%d} '
+                   f'archived in {archive_dir()}.')
+        if archived and not no_vacuum:
+            compact_database()
+            click.echo('Database vacuumed and analyzed.')
+
+    @app.cli.command('jobs-worker')
+    @click.option('--threads', type=int, default=None, help='Jobs run concurrently (default: JOBS_WORKER_THREADS).')
+    @click.option('--once', is_flag=True, help='Run the jobs that are due, then exit.')
+    def jobs_worker_command(threads, once):
+        """Run queued background jobs (notifications, PDF copies)."""
+        import time
+        from jobs import JobWorker, run_pending
+
+        if once:
+            total = 0
+            while True:
+                processed = run_pending()
+                if not processed:
+                    break
+                total += processed
+            click.echo(f'{total} jobs run.')
+            return
+
+        worker = JobWorker(app, threads=threads or app.config['JOBS_WORKER_THREADS'],
+                           poll_interval=app.config['JOBS_POLL_INTERVAL'])
+        worker.start()
+        click.echo(f'Job worker started with {worker.threads} threads, press Ctrl+C to stop.')
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            worker.stop()
+
+    @app.cli.command('assets-build')
+    @click.option('--clean', is_flag=True, help='Remove the files of previous builds first.')
+    def assets_build_command(clean):
+        """Minify, fingerprint and precompress the static files."""
+        from assets import assets_dir, build_assets
+
+        manifest = build_assets(app.static_folder, assets_dir(app),
+                                image_max_width=app.config['ASSETS_IMAGE_MAX_WIDTH'], clean=clean)
+        for source, built in sorted(manifest.items()):
+            click.echo(f'  {source} -> {built}')
+        click.echo(f'{len(manifest)} assets built in {assets_dir(app)}.')
+
+    @app.cli.command('templates-compile')
+    def templates_compile_command():
+        """Compile every template into the bytecode cache."""
+        from templating import compile_templates
+
+        if app.jinja_env.bytecode_cache is None:
+            raise click.ClickException('TEMPLATE_BYTECODE_CACHE is disabled.')
+        names = compile_templates(app)
+        click.echo(f'{len(names)} templates compiled.')
@@ -0,0 +1,231 @@
+import io
+from datetime import date, datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db
+
+
+def engine_options(config):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from the pool settings in the config.
+
+    Explicit entries in SQLALCHEMY_ENGINE_OPTIONS always win. In-memory SQLite
+    databases use a single static connection, so no pool sizing applies.
+    PostgreSQL connections get a connect timeout, a server-side statement
+    timeout and an application name.
+
+    Args:
+        config: The Flask application config
+
+    Returns:
+        A dict of keyword arguments for sqlalchemy.create_engine
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+
+    options.setdefault('pool_pre_ping', config.get('SQLALCHEMY_POOL_PRE_PING', True))
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            return options
+        connect_args = dict(options.get('connect_args') or {})
+        # Seconds the driver waits for a lock before raising "database is locked"
+        connect_args.setdefault('timeout', config.get('SQLITE_BUSY_TIMEOUT', 30))
+        options['connect_args'] = connect_args
+    elif url.get_backend_name() == 'postgresql':
+        connect_args = dict(options.get('connect_args') or {})
+        connect_args.setdefault('connect_timeout', config.get('POSTGRES_CONNECT_TIMEOUT', 10))
+        connect_args.setdefault('application_name', config.get('POSTGRES_APPLICATION_NAME', 'internship-portal'))
+        statement_timeout = config.get('POSTGRES_STATEMENT_TIMEOUT')
+        if statement_timeout:
+            connect_args.setdefault('options', f'-c statement_timeout={int(statement_timeout)}')
+        options['connect_args'] = connect_args
+
+    options.setdefault('pool_size', config.get('SQLALCHEMY_POOL_SIZE', 5))
+    options.setdefault('max_overflow', config.get('SQLALCHEMY_MAX_OVERFLOW', 10))
+    options.setdefault('pool_timeout', config.get('SQLALCHEMY_POOL_TIMEOUT', 30))
+    options.setdefault('pool_recycle', config.get('SQLALCHEMY_POOL_RECYCLE', 1800))
+    return options
+
+
+def init_database(app):
+    """Configure the engine for `app` and initialize Flask-SQLAlchemy.
+
+    For SQLite, the SQLITE_PRAGMAS from the config are applied to every new
+    connection (WAL journaling, relaxed fsync, busy timeout, memory mapping).
+
+    Args:
+        app: The Flask application instance
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+def _copy_value(value):
+    """Format one value for COPY ... WITH (FORMAT csv, NULL '\\N')."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, datetime):
+        value = value.isoformat(sep=' ')
+    elif isinstance(value, date):
+        value = value.isoformat()
+    # Quoted values are never read as NULL, even a literal \N
+    return '"{}"'.format(str(value).replace('"', '""'))
+
+
+def format_copy_rows(columns, rows):
+    """Serialize `rows` as the CSV payload of a PostgreSQL COPY FROM STDIN.
+
+    Args:
+        columns: Column names, in COPY column order
+        rows: Dicts keyed by column name
+
+    Returns:
+        The payload as a string
+    """
+    return ''.join(
+        ','.join(_copy_value(row.get(name)) for name in columns) + '\n' for row in rows
+    )
+
+
+def _missing_defaults(table, row):
+    """Return {column name: default} for the columns of `table` absent from `row`.
+
+    Only scalar and callable Python-side defaults are returned; callables are
+    evaluated once, so every row of a batch gets the same value.
+    """
+    defaults = {}
+    for column in table.columns:
+        default = column.default
+        if column.name in row or default is None:
+            continue
+        if default.is_scalar:
+            defaults[column.name] = default.arg
+        elif default.is_callable:
+            defaults[column.name] = default.arg(None)
+    return defaults
+
+
+def _insert_sqlite(connection, table, rows):
+    """Insert `rows` with one executemany on the sqlite3 cursor.
+
+    Skips the per-row parameter processing of a Core executemany. Values
+    still go through the bind processors of the column types, so they are
+    stored exactly as an INSERT through SQLAlchemy would store them.
+    """
+    dialect = connection.dialect
+    defaults = _missing_defaults(table, rows[0])
+    names = list(rows[0])
+    columns = names + list(defaults)
+    processors = [dialect.type_descriptor(table.c[name].type).bind_processor(dialect) for name in columns]
+    fixed = tuple(
+        processor(value) if processor else value
+        for processor, value in zip(processors[len(names):], defaults.values())
+    )
+    # Formatting a datetime costs microseconds, and a batch repeats the same
+    # values (updated_at is created_at, flags are True or False): memoize
+    processors = [(index, processor, {}) for index, processor in enumerate(processors[:len(names)])
+                  if processor]
+
+    def values(row):
+        row = [row[name] for name in names]
+        for index, processor, processed in processors:
+            value = row[index]
+            if value is not None:
+                try:
+                    row[index] = processed[value]
+                except KeyError:
+                    row[index] = processed[value] = processor(value)
+        return tuple(row) + fixed
+
+    preparer = dialect.identifier_preparer
+    statement = (
+        f'INSERT INTO {preparer.format_table(table)} ({", ".join(preparer.quote(c) for c in columns)}) '
+        f'VALUES ({", ".join("?" * len(columns))})'
+    )
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.executemany(statement, map(values, rows))
+    finally:
+        cursor.close()
+
+
+def copy_payload(table, rows):
+    """Return the COPY column list and CSV payload for inserting `rows`.
+
+    COPY does not apply the Python-side `default=` of the model, so every
+    scalar or callable default of a column missing from the rows is added
+    here, as an INSERT would (callables are evaluated once per call).
+
+    Args:
+        table: The Table to insert into
+        rows: Dicts keyed by column name, all with the same keys
+
+    Returns:
+        A (columns, payload) tuple
+    """
+    columns = list(rows[0])
+    defaults = _missing_defaults(table, rows[0])
+    if defaults:
+        columns += list(defaults)
+        rows = (dict(defaults, **row) for row in rows)
+    return columns, format_copy_rows(columns, rows)
+
+
+def copy_rows(connection, table, rows):
+    """Insert `rows` into `table`, with COPY on PostgreSQL.
+
+    COPY streams all rows in a single command, which PostgreSQL loads several
+    times faster than even a multi-row INSERT. SQLite gets an executemany on
+    the raw sqlite3 cursor; other backends and drivers fall back to a Core
+    executemany INSERT. Runs in the transaction of `connection`.
+
+    Args:
+        connection: A SQLAlchemy Connection, e.g. db.session.connection()
+        table: The Table to insert into
+        rows: Dicts keyed by column name, all with the same keys
+    """
+    if not rows:
+        return
+    driver = connection.dialect.driver
+    if connection.dialect.name == 'sqlite' and driver == 'pysqlite':
+        _insert_sqlite(connection, table, rows)
+        return
+    if connection.dialect.name != 'postgresql' or driver not in ('psycopg', 'psycopg2'):
+        connection.execute(table.insert(), rows)
+        return
+
+    columns, payload = copy_payload(table, rows)
+    preparer = connection.dialect.identifier_preparer
+    statement = (
+        f'COPY {preparer.format_table(table)} ({", ".join(preparer.quote(c) for c in columns)}) '
+        "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    )
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if driver == 'psycopg':
+            with cursor.copy(statement) as copy:
+                copy.write(payload)
+        else:
+            cursor.copy_expert(statement, io.StringIO(payload))
+    finally:
+        cursor.close()
@@ -0,0 +1,150 @@
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import bindparam, event, func, select, update
+
+from models import db, InternshipForm
+
+# Legal-form words that do not distinguish one company from another
+COMPANY_SUFFIXES = {'sa', 'sarl', 'suarl', 'sas', 'sasu', 'gie', 'sci', 'ltd', 'inc', 'llc', 'cie'}
+
+# InternshipForm columns the duplicate key is computed from
+DEDUPE_COLUMNS = ('company_name', 'contact_email', 'internship_topic1', 'internship_topic2',
+                  'internship_topic3')
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+@lru_cache(maxsize=4096)
+def normalize_text(value):
+    """Casefold `value`, strip accents and punctuation and collapse whitespace.
+
+    Cached: topics and company names repeat across the rows of an import.
+    """
+    value = value or ''
+    if not value.isascii():
+        # ASCII text has no accents to strip: skip the per-character pass
+        decomposed = unicodedata.normalize('NFKD', value)
+        value = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(_NON_WORD.sub(' ', value.casefold()).split())
+
+
+def normalize_company(name):
+    """Normalize a company name, ignoring legal forms such as SA or SARL."""
+    words = normalize_text(name).split()
+    return ' '.join(word for word in words if word not in COMPANY_SUFFIXES) or ' '.join(words)
+
+
+def dedupe_key(values):
+    """Return the duplicate-detection key of a form.
+
+    Two submissions share a key when they come from the same company name
+    (ignoring case, accents, punctuation and legal form) and contact email,
+    and offer the same set of internship topics in any order.
+
+    Args:
+        values: A mapping or object with the DEDUPE_COLUMNS values
+
+    Returns:
+        A 40-character hexadecimal key
+    """
+    get = values.get if isinstance(values, dict) else lambda name: getattr(values, name)
+    topics = sorted(filter(None, (normalize_text(get(name)) for name in DEDUPE_COLUMNS[2:])))
+    parts = [normalize_company(get('company_name')), (get('contact_email') or '').strip().casefold()]
+    return hashlib.sha1('\x1f'.join(parts + topics).encode('utf-8')).hexdigest()
+
+
+def find_duplicate(form, window_days):
+    """Return the most recent earlier submission with the same key, if any.
+
+    Args:
+        form: An unsaved InternshipForm
+        window_days: Only submissions from the last `window_days` days match
+
+    Returns:
+        The matching InternshipForm, or None
+    """
+    since = datetime.utcnow() - timedelta(days=window_days)
+    return InternshipForm.query.filter(
+        InternshipForm.dedupe_key == dedupe_key(form),
+        InternshipForm.created_at >= since,
+    ).order_by(InternshipForm.created_at.desc(), InternshipForm.id.desc()).first()
+
+
+def backfill_dedupe_keys(batch_size=1000):
+    """Compute the key of forms that have none (e.g. rows from before the column).
+
+    Returns:
+        The number of rows updated
+    """
+    columns = [InternshipForm.id] + [getattr(InternshipForm, name) for name in DEDUPE_COLUMNS]
+    updated = 0
+    while True:
+        rows = db.session.execute(
+            select(*columns).where(InternshipForm.dedupe_key.is_(None)).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return updated
+        # Core executemany with bindparams: one statement, no ORM flush bookkeeping
+        db.session.execute(
+            update(InternshipForm.__table__)
+            .where(InternshipForm.__table__.c.id == bindparam('form_id'))
+            .values(dedupe_key=bindparam('key')),
+            [{'form_id': row['id'], 'key': dedupe_key(row)} for row in rows]
+        )
+        db.session.commit()
+        updated += len(rows)
+
+
+def duplicate_groups(window_days):
+    """Cluster forms sharing a key with one GROUP BY over the key index.
+
+    Grouping by the precomputed key takes near-linear time, instead of the
+    quadratic cost of comparing every pair of forms. The forms of each key
+    are then walked in submission order, and a gap of more than
+    `window_days` days between two of them starts a new cluster, so a
+    company that sends the same offer every year is not reported.
+
+    Each cluster keeps its oldest reviewed form, or its oldest form if none
+    was reviewed. Reviewed forms are never listed as duplicates.
+
+    Args:
+        window_days: Largest gap, in days, between two forms of a cluster
+
+    Returns:
+        A list of (kept id, [duplicate ids]) tuples, duplicates oldest first
+    """
+    window = timedelta(days=window_days)
+    keys = select(InternshipForm.dedupe_key).where(InternshipForm.dedupe_key.isnot(None)) \
+        .group_by(InternshipForm.dedupe_key).having(func.count() > 1)
+    rows = db.session.execute(
+        select(InternshipForm.dedupe_key, InternshipForm.id, InternshipForm.created_at,
+               InternshipForm.reviewed_at)
+        .where(InternshipForm.dedupe_key.in_(keys))
+        .order_by(InternshipForm.dedupe_key, InternshipForm.created_at, InternshipForm.id)
+    )
+
+    clusters = []
+    previous_key = previous_created = None
+    for key, form_id, created_at, reviewed_at in rows:
+        if key != previous_key or created_at - previous_created > window:
+            clusters.append([])
+        clusters[-1].append((form_id, reviewed_at is not None))
+        previous_key, previous_created = key, created_at
+
+    groups = []
+    for cluster in clusters:
+        kept = next((form_id for form_id, reviewed in cluster if reviewed), cluster[0][0])
+        duplicates = [form_id for form_id, reviewed in cluster if not reviewed and form_id != kept]
+        if duplicates:
+            groups.append((kept, duplicates))
+    return groups
+
+
+@event.listens_for(InternshipForm, 'before_insert')
+@event.listens_for(InternshipForm, 'before_update')
+def _set_dedupe_key(mapper, connection, target):
+    target.dedupe_key = dedupe_key(target)
@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from models import db, InternshipForm, SERIALIZED_FIELDS, serialize_value
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Rows fetched from the database cursor at a time, and rows per chunk sent
+# to the client; together they bound the memory used by an export.
+FETCH_SIZE = 1000
+CHUNK_ROWS = 500
+
+
+class ExportError(ValueError):
+    """Raised for invalid export parameters or a missing optional dependency."""
+
+
+def parse_filters(args):
+    """Build export filters from request arguments.
+
+    Args:
+        args: A mapping with optional `since`, `until` (YYYY-MM-DD, inclusive)
+            and `approved` (true/false) keys
+
+    Returns:
+        A dict of keyword arguments for export_query
+
+    Raises:
+        ExportError: If a value cannot be parsed
+    """
+    filters = {}
+    for key in ('since', 'until'):
+        value = args.get(key)
+        if value:
+            try:
+                filters[key] = datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ExportError(f'Invalid {key} date, expected YYYY-MM-DD')
+
+    approved = args.get('approved')
+    if approved:
+        if approved.lower() not in ('true', 'false', '1', '0'):
+            raise ExportError('Invalid approved value, expected true or false')
+        filters['approved'] = approved.lower() in ('true', '1')
+    return filters
+
+
+def export_query(since=None, until=None, approved=None):
+    """Return the Core SELECT for an export, oldest submission first.
+
+    Plain column tuples are selected rather than ORM objects so rows are not
+    tracked by the session and can be discarded as soon as they are written.
+    """
+    table = InternshipForm.__table__
+    query = select(*(table.c[name] for name in SERIALIZED_FIELDS))
+    if since is not None:
+        query = query.where(table.c.created_at >= since)
+    if until is not None:
+        query = query.where(table.c.created_at < until + timedelta(days=1))
+    if approved is not None:
+        query = query.where(table.c.is_approved == approved)
+    return query.order_by(table.c.created_at, table.c.id)
+
+
+def iter_rows(**filters):
+    """Yield export rows as tuples using a server-side cursor."""
+    result = db.session.execute(
+        export_query(**filters).execution_options(yield_per=FETCH_SIZE)
+    )
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def generate_csv(rows):
+    """Yield a CSV document in chunks, starting with the header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The byte order mark lets Excel detect UTF-8 (accents in company names)
+    buffer.write('\ufeff')
+    writer.writerow(SERIALIZED_FIELDS)
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(serialize_value(value) for value in row)
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def generate_jsonl(rows):
+    """Yield one JSON object per line, in chunks."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(
+            {name: serialize_value(value) for name, value in zip(SERIALIZED_FIELDS, row)},
+            ensure_ascii=False
+        ))
+        if len(lines) == CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines.clear()
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def generate_xlsx(rows, chunk_size=65536):
+    """Yield an XLSX workbook built with openpyxl's write-only mode.
+
+    The workbook is written row by row to a temporary file (a ZIP archive
+    cannot be emitted before it is complete), then streamed from disk.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Formulaires')
+    sheet.append(SERIALIZED_FIELDS)
+    for row in rows:
+        sheet.append(list(row))
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+GENERATORS = {
+    'csv': generate_csv,
+    'jsonl': generate_jsonl,
+    'xlsx': generate_xlsx,
+}
+
+
+def generate_export(fmt, **filters):
+    """Return a generator producing the export document in the given format.
+
+    Args:
+        fmt: One of EXPORT_FORMATS
+        **filters: Keyword arguments for export_query
+
+    Raises:
+        ExportError: If the format is unknown or unavailable
+    """
+    if fmt not in GENERATORS:
+        raise ExportError(f'Unsupported export format: {fmt}')
+    if fmt == 'xlsx':
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            raise ExportError('XLSX export requires the openpyxl package')
+    return GENERATORS[fmt](iter_rows(**filters))
@@ -1,5 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, DateField, BooleanField, SubmitField, IntegerField
+from wtforms import (StringField, TextAreaField, DateField, BooleanField, SubmitField, IntegerField,
+                     HiddenField, PasswordField)
 from wtforms.validators import DataRequired, Email, Length, Optional
 
 class InternshipFormSubmission(FlaskForm):
@@ -97,5 +98,35 @@ class InternshipFormSubmission(FlaskForm):
         Length(max=100, message='L\'emplacement doit être moins de 100 caractères')
     ])
     
+    # Idempotency token generated when the form is displayed; a replayed
+    # POST (double click, browser resubmission) carries the same token
+    submission_token = HiddenField(validators=[
+        Optional(),
+        Length(max=64)
+    ])
+    
     # Submit button
-    submit = SubmitField('Soumettre le formulaire') 
\ No newline at end of file
+    submit = SubmitField('Soumettre le formulaire') 
+
+class ReviewerLoginForm(FlaskForm):
+    """Sign-in form of the review queue, protected by the shared ADMIN_TOKEN."""
+    reviewer = StringField('Votre nom', validators=[
+        DataRequired(),
+        Length(max=100, message='Le nom doit être moins de 100 caractères')
+    ])
+    token = PasswordField('Jeton administrateur', validators=[DataRequired()])
+    submit = SubmitField('Se connecter')
+
+
+class ReviewForm(FlaskForm):
+    """Bulk decision on the forms checked in the review queue.
+
+    The checked form ids are read from the `form_ids` checkboxes of the
+    queue page; this form carries the decision and the CSRF token.
+    """
+    note = StringField('Commentaire', validators=[
+        Optional(),
+        Length(max=500, message='Le commentaire doit être moins de 500 caractères')
+    ])
+    approve = SubmitField('Approuver la sélection')
+    reject = SubmitField('Rejeter la sélection')
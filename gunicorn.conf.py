@@ -0,0 +1,30 @@
+"""Gunicorn settings for the Internship Form Portal.
+
+Every value can be overridden from the environment or the command line.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8080')
+
+# Each worker is a separate process with its own connection pool and its
+# own in-memory page cache. SQLite in WAL mode lets all workers read
+# concurrently while writes are serialized; busy_timeout makes a writer
+# wait for the lock instead of failing with "database is locked".
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+
+# The application is not preloaded: engines and connection pools must be
+# created after the fork, never shared between worker processes.
+preload_app = False
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
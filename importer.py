@@ -0,0 +1,319 @@
+import csv
+import json
+import re
+from datetime import datetime
+
+from werkzeug.datastructures import MultiDict
+from wtforms import validators as wtf_validators
+
+from models import db, InternshipForm
+from cache import response_cache
+from database import copy_rows
+from stats import record_forms
+from dedupe import dedupe_key
+from search import deferred_indexing
+from forms import InternshipFormSubmission
+
+IMPORT_FORMATS = ('csv', 'jsonl', 'json')
+
+# Values treated as "unchecked" for boolean columns coming from CSV or JSON
+FALSE_VALUES = {'', '0', 'false', 'no', 'non', 'n', 'off', 'none', 'null'}
+
+
+class ImportResult:
+    """Outcome of a bulk import.
+
+    Attributes:
+        inserted: Number of rows written to the database
+        errors: List of (record number, {field: [messages]}) for rejected rows
+    """
+
+    def __init__(self):
+        self.inserted = 0
+        self.errors = []
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def to_dict(self, max_errors=100):
+        """Summarize the result for a JSON response."""
+        return {
+            'inserted': self.inserted,
+            'failed': self.failed,
+            'errors': [
+                {'record': number, 'errors': errors}
+                for number, errors in self.errors[:max_errors]
+            ]
+        }
+
+
+def iter_csv(stream):
+    """Yield one dict per CSV row; the first row holds the column names."""
+    yield from csv.DictReader(stream)
+
+
+def iter_jsonl(stream):
+    """Yield one dict per non-blank line of a JSON Lines stream."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_json_array(stream, chunk_size=65536):
+    """Yield the objects of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+
+    while True:
+        buffer = buffer.lstrip()
+        if not started:
+            if buffer:
+                if buffer[0] != '[':
+                    raise ValueError('Expected a JSON array')
+                buffer = buffer[1:]
+                started = True
+                continue
+        elif buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+        elif buffer.startswith(']'):
+            return
+        elif buffer:
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield record
+                buffer = buffer[end:]
+                continue
+
+        if eof:
+            raise ValueError('Unexpected end of JSON array')
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+# Conservative pattern for plain ASCII addresses (dot-atom local part, LDH
+# domain labels, alphabetic TLD). Every match is also accepted by
+# email_validator; anything else is left to the real Email validator.
+SIMPLE_EMAIL = re.compile(
+    r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+([A-Za-z]{2,63})"
+)
+SPECIAL_USE_TLDS = {'arpa', 'invalid', 'local', 'localhost', 'onion', 'test'}
+
+# Integers accepted without WTForms; other spellings ('+5', ' 5', non-ASCII
+# digits) are left to IntegerField
+SIMPLE_INTEGER = re.compile(r'-?[0-9]+')
+
+
+class FastValidator:
+    """Precompiled acceptance check derived from a form's validators.
+
+    Running the full WTForms validation chain costs several hundred
+    microseconds per record. This class reads the validators declared on
+    InternshipFormSubmission once and evaluates them with plain Python
+    checks. It only ever *accepts* records: when a record fails or uses a
+    construct it does not model, the caller falls back to WTForms, which
+    produces the authoritative error messages. Fields with validators it
+    does not recognize are therefore always checked by WTForms.
+    """
+
+    def __init__(self, form, fields):
+        # Field names by type; (name, required) for integers and
+        # (name, required, min length, max length, email) for strings
+        self.booleans, self.integers, self.strings = [], [], []
+        self.supported = True
+        for name in fields:
+            field = form[name]
+            if field.type not in ('StringField', 'IntegerField', 'BooleanField') \
+                    or hasattr(form, f'validate_{name}'):
+                self.supported = False
+                return
+
+            required = optional = email = False
+            min_length, max_length = -1, -1
+            for validator in field.validators:
+                if isinstance(validator, wtf_validators.DataRequired):
+                    required = True
+                elif isinstance(validator, wtf_validators.Optional):
+                    optional = True
+                elif isinstance(validator, wtf_validators.Length):
+                    min_length, max_length = validator.min, validator.max
+                elif isinstance(validator, wtf_validators.Email) and not validator.allow_empty_local:
+                    email = True
+                else:
+                    self.supported = False
+                    return
+            if max_length == -1:
+                max_length = float('inf')
+            required = required and not optional
+            if field.type == 'BooleanField':
+                self.booleans.append(name)
+            elif field.type == 'IntegerField':
+                self.integers.append((name, required))
+            else:
+                self.strings.append((name, required, min_length, max_length, email))
+
+    def check(self, data):
+        """Return the validated row for `data`, or None to defer to WTForms."""
+        if not self.supported:
+            return None
+
+        # One loop per field type: this runs for every imported record
+        row = {name: data.get(name) is not None for name in self.booleans}
+        for name, required in self.integers:
+            value = data.get(name)
+            if not value:
+                if required:
+                    return None
+                row[name] = None
+            elif SIMPLE_INTEGER.fullmatch(value):
+                row[name] = int(value)
+            else:
+                return None
+        for name, required, min_length, max_length, email in self.strings:
+            value = data.get(name)
+            if not value:
+                if required:
+                    return None
+            elif not min_length <= len(value) <= max_length or (email and not is_simple_email(value)):
+                return None
+            row[name] = value
+        return row
+
+
+def is_simple_email(value):
+    """Return True if `value` is a plain address that email_validator accepts."""
+    match = SIMPLE_EMAIL.fullmatch(value)
+    if not match or len(value) > 254:
+        return False
+    local, _, domain = value.partition('@')
+    return len(local) <= 64 and '--' not in domain and match.group(1).lower() not in SPECIAL_USE_TLDS
+
+
+READERS = {
+    'csv': iter_csv,
+    'jsonl': iter_jsonl,
+    'json': iter_json_array,
+}
+
+
+def _field_names(form):
+    """Return the form fields that map to model columns."""
+    return [name for name in form._fields if name not in ('submit', 'csrf_token', 'submission_token')]
+
+
+def _to_formdata(record, boolean_fields):
+    """Convert a raw record into a dict of stripped string values."""
+    data = {}
+    for key, value in record.items():
+        if value is None or key is None:
+            continue
+        if key in boolean_fields:
+            if isinstance(value, bool):
+                value = 'y' if value else ''
+            if str(value).strip().lower() in FALSE_VALUES:
+                continue
+        data[key] = str(value).strip()
+    return data
+
+
+def _parse_created_at(value):
+    """Parse an optional historical submission date (ISO 8601)."""
+    if value in (None, ''):
+        return None
+    return datetime.fromisoformat(str(value).strip())
+
+
+def import_forms(stream, fmt, batch_size=5000, dry_run=False):
+    """Validate and insert submissions from a CSV, JSON Lines or JSON stream.
+
+    Each record is validated with the same rules as InternshipFormSubmission.
+    Valid rows are inserted with multi-row INSERT statements (COPY on
+    PostgreSQL), one transaction per batch, so a large file never sits in memory and a failure only rolls
+    back the current batch. On SQLite each batch is added to the search
+    index in one statement. An optional `created_at` column preserves the
+    original date of digitized paper forms.
+
+    Args:
+        stream: A text stream to read records from
+        fmt: One of IMPORT_FORMATS
+        batch_size: Number of rows per transaction
+        dry_run: Validate only, without writing to the database
+
+    Returns:
+        An ImportResult
+    """
+    if fmt not in READERS:
+        raise ValueError(f'Unsupported import format: {fmt}')
+
+    # A single form instance is reused for every record that needs the full
+    # WTForms chain; process() rebinds the field data without rebuilding fields.
+    form = InternshipFormSubmission(formdata=None, meta={'csrf': False})
+    fields = _field_names(form)
+    boolean_fields = {name for name in fields if form[name].type == 'BooleanField'}
+    fast = FastValidator(form, fields)
+
+    result = ImportResult()
+    batch = []
+
+    def flush():
+        if batch and not dry_run:
+            try:
+                # Core insert (COPY on PostgreSQL) skips the ORM bulk-save bookkeeping;
+                # the batch is added to the search index in one statement
+                connection = db.session.connection()
+                with deferred_indexing(connection):
+                    copy_rows(connection, InternshipForm.__table__, batch)
+                record_forms(batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            # Core inserts bypass the ORM events that invalidate cached lists
+            # (and update the statistics, hence record_forms above)
+            response_cache.invalidate_lists()
+        result.inserted += len(batch)
+        batch.clear()
+
+    for number, record in enumerate(READERS[fmt](stream), start=1):
+        if not isinstance(record, dict):
+            result.errors.append((number, {'record': ['Not an object']}))
+            continue
+
+        formdata = _to_formdata(record, boolean_fields)
+        row = fast.check(formdata)
+        if row is None:
+            form.process(formdata=MultiDict(formdata))
+            if form.validate():
+                row, errors = {name: form[name].data for name in fields}, {}
+            else:
+                errors = dict(form.errors)
+        else:
+            errors = {}
+
+        try:
+            created_at = _parse_created_at(record.get('created_at')) or datetime.utcnow()
+        except ValueError:
+            errors['created_at'] = ['Date invalide, format attendu: AAAA-MM-JJ']
+
+        if errors:
+            result.errors.append((number, errors))
+            continue
+
+        row['created_at'] = row['updated_at'] = created_at
+        row['dedupe_key'] = dedupe_key(row)
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    return result
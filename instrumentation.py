@@ -0,0 +1,214 @@
+import os
+import random
+import threading
+import time
+
+from flask import g, has_request_context, request, Response, before_render_template, template_rendered
+from sqlalchemy import event
+
+from models import db
+
+# Upper bounds (seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """Per-process request metrics rendered in the Prometheus text format.
+
+    Every worker process keeps its own registry; a scraper should target each
+    worker (or aggregate them) rather than go through a load balancer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}       # (endpoint, method, status) -> count
+        self.durations = {}      # endpoint -> [bucket counts..., sum, count]
+        self.sql = {}            # endpoint -> [statements, seconds]
+        self.templates = {}      # endpoint -> [renders, seconds]
+        self.collectors = []
+
+    def register_collector(self, collector):
+        """Add a callable returning extra exposition lines for /metrics."""
+        self.collectors.append(collector)
+
+    def observe(self, endpoint, method, status, duration, sql_count, sql_time,
+                template_count, template_time):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            histogram = self.durations.setdefault(endpoint, [0] * (len(DURATION_BUCKETS) + 2))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    histogram[i] += 1
+            histogram[-2] += duration
+            histogram[-1] += 1
+
+            sql = self.sql.setdefault(endpoint, [0, 0.0])
+            sql[0] += sql_count
+            sql[1] += sql_time
+
+            templates = self.templates.setdefault(endpoint, [0, 0.0])
+            templates[0] += template_count
+            templates[1] += template_time
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines.append('# HELP http_requests_total Requests handled, by endpoint, method and status.')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+            lines.append('# HELP http_request_duration_seconds Wall time spent handling requests.')
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for endpoint, histogram in sorted(self.durations.items()):
+                for bound, count in zip(DURATION_BUCKETS, histogram):
+                    lines.append('http_request_duration_seconds_bucket'
+                                 f'{_labels(endpoint=endpoint, le=bound)} {count}')
+                lines.append('http_request_duration_seconds_bucket'
+                             f'{_labels(endpoint=endpoint, le="+Inf")} {histogram[-1]}')
+                lines.append(f'http_request_duration_seconds_sum{_labels(endpoint=endpoint)} {histogram[-2]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{_labels(endpoint=endpoint)} {histogram[-1]}')
+
+            lines.append('# HELP sql_statements_total SQL statements executed while handling requests.')
+            lines.append('# TYPE sql_statements_total counter')
+            for endpoint, (count, _) in sorted(self.sql.items()):
+                lines.append(f'sql_statements_total{_labels(endpoint=endpoint)} {count}')
+            lines.append('# HELP sql_duration_seconds_total Time spent executing SQL statements.')
+            lines.append('# TYPE sql_duration_seconds_total counter')
+            for endpoint, (_, seconds) in sorted(self.sql.items()):
+                lines.append(f'sql_duration_seconds_total{_labels(endpoint=endpoint)} {seconds:.6f}')
+
+            lines.append('# HELP template_render_seconds_total Time spent rendering Jinja templates.')
+            lines.append('# TYPE template_render_seconds_total counter')
+            for endpoint, (_, seconds) in sorted(self.templates.items()):
+                lines.append(f'template_render_seconds_total{_labels(endpoint=endpoint)} {seconds:.6f}')
+
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+class SlowRequestProfiler:
+    """Keeps cProfile dumps of the slowest sampled requests in a directory.
+
+    Only the `keep` slowest profiles are retained. File names start with the
+    zero-padded request duration, so they sort from fastest to slowest.
+    """
+
+    def __init__(self, directory, keep=20):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, profile, duration, endpoint):
+        name = f'{int(duration * 1000):08d}ms_{endpoint or "unknown"}_{time.time_ns()}.prof'
+        with self._lock:
+            existing = sorted(f for f in os.listdir(self.directory) if f.endswith('.prof'))
+            if len(existing) >= self.keep and name < existing[0]:
+                return
+            profile.dump_stats(os.path.join(self.directory, name))
+            for stale in sorted(existing + [name])[:-self.keep]:
+                try:
+                    os.remove(os.path.join(self.directory, stale))
+                except OSError:
+                    pass
+
+
+def init_instrumentation(app):
+    """Enable request timing, SQL and template accounting for `app`.
+
+    Does nothing unless INSTRUMENTATION_ENABLED is set. When enabled, every
+    response carries a Server-Timing header (total, SQL and template time),
+    /metrics exposes aggregated counters, and a PROFILE_SAMPLE_RATE fraction
+    of requests is profiled with cProfile.
+
+    Args:
+        app: The Flask application instance
+    """
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return
+
+    registry = MetricsRegistry()
+    app.extensions['metrics'] = registry
+
+    sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+    profiler = None
+    if sample_rate > 0:
+        profiler = SlowRequestProfiler(
+            app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles'),
+            keep=app.config.get('PROFILE_KEEP_SLOWEST', 20)
+        )
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['statement_started'].pop()
+        if has_request_context() and 'request_started' in g:
+            g.sql_count += 1
+            g.sql_time += elapsed
+
+    def start_template_timer(sender, template, context, **extra):
+        g.setdefault('template_started', []).append(time.perf_counter())
+
+    def stop_template_timer(sender, template, context, **extra):
+        if g.get('template_started'):
+            g.template_count += 1
+            g.template_time += time.perf_counter() - g.template_started.pop()
+
+    before_render_template.connect(start_template_timer, app, weak=False)
+    template_rendered.connect(stop_template_timer, app, weak=False)
+
+    @app.before_request
+    def start_request_timer():
+        g.sql_count = g.template_count = 0
+        g.sql_time = g.template_time = 0.0
+        g.profile = None
+        if profiler is not None and random.random() < sample_rate:
+            import cProfile
+
+            g.profile = cProfile.Profile()
+            g.profile.enable()
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        if 'request_started' not in g:
+            return response
+        duration = time.perf_counter() - g.request_started
+        if g.profile is not None:
+            g.profile.disable()
+            profiler.save(g.profile, duration, request.endpoint)
+
+        response.headers.add('Server-Timing', ', '.join((
+            f'app;dur={duration * 1000:.2f}',
+            f'db;dur={g.sql_time * 1000:.2f};desc="{g.sql_count} queries"',
+            f'tpl;dur={g.template_time * 1000:.2f}',
+        )))
+        registry.observe(
+            request.endpoint or 'unknown', request.method, response.status_code, duration,
+            g.sql_count, g.sql_time, g.template_count, g.template_time
+        )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Expose request metrics in the Prometheus text format."""
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
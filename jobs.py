@@ -0,0 +1,223 @@
+import json
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from models import db, Job
+
+# Job kind -> callable receiving the job payload as keyword arguments
+HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler of `kind` jobs.
+
+    Handlers run inside an application context and must be idempotent: a job
+    is retried when its handler raises, and re-run if its worker dies.
+    """
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, delay=0, max_attempts=None, **payload):
+    """Add a job to the current database session.
+
+    The job is committed together with the caller's transaction, so it is
+    only ever run for data that was actually saved.
+
+    Args:
+        kind: The registered handler name
+        delay: Seconds before the job becomes due
+        max_attempts: Attempts before giving up (default: JOBS_MAX_ATTEMPTS)
+        **payload: JSON-serializable keyword arguments for the handler
+
+    Returns:
+        The pending Job instance
+    """
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts or current_app.config['JOBS_MAX_ATTEMPTS'],
+    )
+    db.session.add(job)
+    return job
+
+
+def retry_delay(attempts, config):
+    """Return the backoff in seconds before the retry following `attempts` failures."""
+    return min(config['JOBS_RETRY_MAX_DELAY'], config['JOBS_RETRY_BASE_DELAY'] * 2 ** (attempts - 1))
+
+
+def claim_jobs(limit):
+    """Mark up to `limit` due jobs as running and return their ids.
+
+    Each job is claimed with a conditional UPDATE, so several worker threads
+    or processes can poll the same table without running a job twice. Jobs
+    left running longer than JOBS_LOCK_TIMEOUT (a crashed worker) are
+    released first.
+
+    An idle poll only reads: on SQLite any UPDATE takes the database write
+    lock, even when it matches no row, and every worker thread polls.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config['JOBS_LOCK_TIMEOUT'])
+    is_stale = db.and_(Job.status == 'running', Job.locked_at < stale)
+    if db.session.scalar(select(Job.id).where(is_stale).limit(1)) is not None:
+        db.session.execute(update(Job).where(is_stale).values(status='pending'))
+
+    due = db.session.scalars(
+        select(Job.id)
+        .where(Job.status == 'pending', Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        # PostgreSQL: skip rows another worker is claiming (ignored by SQLite)
+        .with_for_update(skip_locked=True)
+    ).all()
+    claimed = []
+    for job_id in due:
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'pending')
+            .values(status='running', locked_at=now, attempts=Job.attempts + 1)
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    db.session.commit()
+    return claimed
+
+
+def run_job(job_id):
+    """Run one claimed job and record its outcome.
+
+    Args:
+        job_id: The id of a job in the 'running' state
+
+    Returns:
+        True if the handler succeeded, False if it raised
+    """
+    job = db.session.get(Job, job_id)
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'no handler registered for job kind {job.kind!r}')
+        handler(**json.loads(job.payload))
+    except Exception as exc:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.last_error = f'{type(exc).__name__}: {exc}'
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            current_app.logger.error('Job %s (%s) failed permanently: %s', job.id, job.kind, job.last_error)
+        else:
+            job.status = 'pending'
+            job.run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts, current_app.config))
+            current_app.logger.warning('Job %s (%s) failed, retrying at %s: %s',
+                                       job.id, job.kind, job.run_at, job.last_error)
+        db.session.commit()
+        return False
+
+    job = db.session.get(Job, job_id)
+    job.status = 'done'
+    job.locked_at = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def run_pending(limit=100):
+    """Claim and run up to `limit` due jobs (application context required).
+
+    Returns:
+        The number of jobs run
+    """
+    import tasks  # noqa: F401  registers the handlers
+
+    job_ids = claim_jobs(limit)
+    for job_id in job_ids:
+        run_job(job_id)
+    return len(job_ids)
+
+
+class JobWorker:
+    """Threads that poll the job table and run due jobs.
+
+    Every thread claims one job at a time, so slow jobs do not hold back the
+    others. Call `wake()` after enqueuing to skip the poll interval.
+    """
+
+    def __init__(self, app, threads=1, poll_interval=5):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for number in range(self.threads):
+            thread = threading.Thread(target=self._run, name=f'job-worker-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    processed = run_pending(limit=1)
+                    db.session.remove()
+            except Exception:
+                self.app.logger.exception('Job worker iteration failed')
+                processed = 0
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+_worker_lock = threading.Lock()
+
+
+def init_jobs(app):
+    """Run a JobWorker inside the web process when JOBS_IN_APP_WORKER is set.
+
+    The worker is started by the first request rather than here, so that it
+    lives in the serving process (after any fork) and not in CLI commands.
+
+    Args:
+        app: The Flask application instance
+    """
+    if not app.config.get('JOBS_IN_APP_WORKER'):
+        return
+
+    @app.before_request
+    def start_job_worker():
+        if 'job_worker' in app.extensions:
+            return
+        with _worker_lock:
+            if 'job_worker' not in app.extensions:
+                worker = JobWorker(app, threads=app.config['JOBS_WORKER_THREADS'],
+                                   poll_interval=app.config['JOBS_POLL_INTERVAL'])
+                worker.start()
+                app.extensions['job_worker'] = worker
+
+
+def wake_worker():
+    """Tell the in-process worker, if any, that new jobs were committed."""
+    worker = current_app.extensions.get('job_worker')
+    if worker is not None:
+        worker.wake()
@@ -0,0 +1,78 @@
+import smtplib
+from email.message import EmailMessage
+
+from flask import current_app
+
+# Messages delivered by the 'memory' backend, most recent last (tests inspect it)
+outbox = []
+
+
+class MailError(RuntimeError):
+    """Raised when a message cannot be handed over to the mail server."""
+
+
+def _header(value):
+    """Collapse every run of whitespace in a header value to a single space."""
+    return ' '.join(value.split())
+
+
+def build_message(subject, recipients, body, attachments=(), sender=None):
+    """Build an email message.
+
+    Runs of whitespace in the header values, including line breaks that a
+    company name may carry, are collapsed to single spaces: EmailMessage
+    refuses header values containing CR or LF.
+
+    Args:
+        subject: The subject line
+        recipients: List of recipient addresses
+        body: Plain-text body
+        attachments: Iterable of (filename, mimetype, bytes) tuples
+        sender: From address (default: MAIL_DEFAULT_SENDER)
+
+    Returns:
+        An email.message.EmailMessage
+    """
+    message = EmailMessage()
+    message['Subject'] = _header(subject)
+    message['From'] = _header(sender or current_app.config['MAIL_DEFAULT_SENDER'])
+    message['To'] = ', '.join(_header(recipient) for recipient in recipients)
+    message.set_content(body)
+    for filename, mimetype, data in attachments:
+        maintype, _, subtype = mimetype.partition('/')
+        message.add_attachment(data, maintype=maintype, subtype=subtype, filename=filename)
+    return message
+
+
+def send_message(message):
+    """Deliver `message` with the configured MAIL_BACKEND.
+
+    'smtp' sends through MAIL_SERVER, 'console' logs the message and 'memory'
+    appends it to `outbox`.
+
+    Args:
+        message: The EmailMessage to send
+
+    Raises:
+        MailError: If the SMTP server refuses or cannot be reached
+    """
+    config = current_app.config
+    backend = config.get('MAIL_BACKEND', 'smtp')
+
+    if backend == 'memory':
+        outbox.append(message)
+    elif backend == 'console':
+        current_app.logger.info('Email to %s: %s', message['To'], message['Subject'])
+    elif backend == 'smtp':
+        try:
+            with smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'],
+                              timeout=config.get('MAIL_TIMEOUT', 30)) as smtp:
+                if config.get('MAIL_USE_TLS'):
+                    smtp.starttls()
+                if config.get('MAIL_USERNAME'):
+                    smtp.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+                smtp.send_message(message)
+        except (OSError, smtplib.SMTPException) as exc:
+            raise MailError(f'cannot send email to {message["To"]}: {exc}') from exc
+    else:
+        raise MailError(f'unknown MAIL_BACKEND {backend!r}')
@@ -11,6 +11,23 @@ class InternshipForm(db.Model):
     with fields matching the official ESP form.
     """
     __tablename__ = 'internship_forms'
+    __table_args__ = (
+        # Keyset pagination of /forms walks (created_at, id)
+        db.Index('ix_internship_forms_created_at_id', 'created_at', 'id'),
+        # Status filters are always combined with the newest-first ordering
+        db.Index('ix_internship_forms_is_approved_created_at', 'is_approved', 'created_at'),
+        db.Index('ix_internship_forms_cannot_accept_created_at', 'cannot_accept', 'created_at'),
+        # Review queue: unreviewed forms walked by (created_at, id), skipping
+        # rejected forms that share is_approved = false
+        db.Index('ix_internship_forms_review_queue', 'is_approved', 'reviewed_at', 'created_at', 'id'),
+        db.Index('ix_internship_forms_company_name', 'company_name'),
+        # Duplicate detection: exact replays by token, lookalikes by normalized key
+        db.Index('ux_internship_forms_submission_token', 'submission_token', unique=True),
+        db.Index('ix_internship_forms_dedupe_key_created_at', 'dedupe_key', 'created_at'),
+        # SQLite would otherwise reuse the highest ids once those forms are
+        # archived, and archived forms are still looked up by id
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     # Timestamp for submission tracking
@@ -48,37 +65,170 @@ class InternshipForm(db.Model):
     # Signature Information
     signature_location = db.Column(db.String(100), nullable=True)
     
-    # Status tracking
+    # Status tracking: pending until reviewed, then approved or rejected
     is_approved = db.Column(db.Boolean, default=False)
+    reviewed_at = db.Column(db.DateTime, nullable=True)
+    
+    # Duplicate detection (see dedupe.py)
+    submission_token = db.Column(db.String(64), nullable=True)
+    dedupe_key = db.Column(db.String(40), nullable=True)
     
     def __repr__(self):
         """String representation of the InternshipForm object."""
         return f'<InternshipForm {self.company_name} - {self.contact_name}>'
     
-    def to_dict(self):
-        """Convert the model instance to a dictionary."""
-        return {
-            'id': self.id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'company_name': self.company_name,
-            'company_address': self.company_address,
-            'contact_phone': self.contact_phone,
-            'contact_fax': self.contact_fax,
-            'contact_email': self.contact_email,
-            'contact_name': self.contact_name,
-            'contact_position': self.contact_position,
-            'contact_phone_direct': self.contact_phone_direct,
-            'contact_fax_direct': self.contact_fax_direct,
-            'contact_email_direct': self.contact_email_direct,
-            'student_name': self.student_name,
-            'student_firstname': self.student_firstname,
-            'internship_positions': self.internship_positions,
-            'internship_topic1': self.internship_topic1,
-            'internship_topic2': self.internship_topic2,
-            'internship_topic3': self.internship_topic3,
-            'wants_meeting': self.wants_meeting,
-            'cannot_accept': self.cannot_accept,
-            'signature_location': self.signature_location,
-            'is_approved': self.is_approved
-        } 
\ No newline at end of file
+    def to_dict(self, fields=None):
+        """Convert the model instance to a dictionary.
+
+        Args:
+            fields: Optional subset of SERIALIZED_FIELDS to include
+
+        Returns:
+            A JSON-serializable dictionary
+        """
+        return {name: serialize_value(getattr(self, name)) for name in (fields or SERIALIZED_FIELDS)}
+
+
+# Forms awaiting review (see review.py)
+PENDING_REVIEW = db.and_(InternshipForm.is_approved == False, InternshipForm.reviewed_at.is_(None))
+
+
+# Public fields of a submission, in the order used by to_dict() and exports
+SERIALIZED_FIELDS = (
+    'id',
+    'created_at',
+    'updated_at',
+    'company_name',
+    'company_address',
+    'contact_phone',
+    'contact_fax',
+    'contact_email',
+    'contact_name',
+    'contact_position',
+    'contact_phone_direct',
+    'contact_fax_direct',
+    'contact_email_direct',
+    'student_name',
+    'student_firstname',
+    'internship_positions',
+    'internship_topic1',
+    'internship_topic2',
+    'internship_topic3',
+    'wants_meeting',
+    'cannot_accept',
+    'signature_location',
+    'is_approved',
+    'reviewed_at',
+)
+
+
+def serialize_value(value):
+    """Convert a column value to its JSON representation (datetimes as ISO 8601)."""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class Job(db.Model):
+    """A unit of background work, persisted so it survives restarts.
+
+    Jobs are claimed by workers in the order of `run_at`. A failed job is
+    rescheduled with exponential backoff until `max_attempts` is reached.
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # Workers poll for due jobs: status = 'pending' AND run_at <= now
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    # pending -> running -> done, or back to pending for a retry, or failed
+    status = db.Column(db.String(10), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        """String representation of the Job object."""
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+
+class WeeklyFormStats(db.Model):
+    """Submission counters per week (Monday), maintained by stats.py."""
+    __tablename__ = 'form_stats_weekly'
+
+    week_start = db.Column(db.Date, primary_key=True)
+    submissions = db.Column(db.Integer, nullable=False, default=0)
+    positions = db.Column(db.Integer, nullable=False, default=0)
+    wants_meeting = db.Column(db.Integer, nullable=False, default=0)
+    cannot_accept = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CompanyFormStats(db.Model):
+    """Submission counters per company name, maintained by stats.py."""
+    __tablename__ = 'form_stats_companies'
+    __table_args__ = (
+        # The dashboard reads the companies with the most submissions
+        db.Index('ix_form_stats_companies_submissions', 'submissions'),
+    )
+
+    company_name = db.Column(db.String(100), primary_key=True)
+    submissions = db.Column(db.Integer, nullable=False, default=0)
+    positions = db.Column(db.Integer, nullable=False, default=0)
+
+
+class FormReview(db.Model):
+    """Audit trail of review decisions, one row per form and decision."""
+    __tablename__ = 'form_reviews'
+    __table_args__ = (
+        db.Index('ix_form_reviews_form_id_created_at', 'form_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # No foreign key: the trail outlives forms deleted as duplicates
+    form_id = db.Column(db.Integer, nullable=False)
+    # 'approve' or 'reject', or 'resubmit' when a duplicate submission
+    # replaced a pending form (see DUPLICATE_UPDATES_PENDING)
+    action = db.Column(db.String(10), nullable=False)
+    reviewer = db.Column(db.String(100), nullable=False)
+    note = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        """String representation of the FormReview object."""
+        return f'<FormReview {self.form_id} {self.action} by {self.reviewer}>'
+
+
+class ArchivedForm(db.Model):
+    """Index of the forms moved to the yearly archive files by archive.py.
+
+    The full record lives in the archive file of `year`; the columns kept
+    here are those shown on list cards and counted by the statistics, so
+    archived forms can be searched and recounted without opening the files.
+    """
+    __tablename__ = 'archived_forms'
+    __table_args__ = (
+        db.Index('ix_archived_forms_created_at', 'created_at'),
+    )
+
+    # The id the form had in internship_forms, so its URL keeps working
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    year = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False)
+    company_name = db.Column(db.String(100), nullable=False)
+    contact_name = db.Column(db.String(100), nullable=False)
+    contact_email = db.Column(db.String(100), nullable=False)
+    contact_phone = db.Column(db.String(20), nullable=False)
+    internship_positions = db.Column(db.Integer, nullable=True)
+    internship_topic1 = db.Column(db.String(200), nullable=True)
+    wants_meeting = db.Column(db.Boolean, default=False)
+    cannot_accept = db.Column(db.Boolean, default=False)
+
+    def __repr__(self):
+        """String representation of the ArchivedForm object."""
+        return f'<ArchivedForm {self.id} ({self.year})>'
@@ -0,0 +1,129 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
+
+from models import InternshipForm
+
+# Columns rendered by a card in list_forms.html. Only these are loaded
+# when listing submissions, the remaining columns stay in the database.
+CARD_COLUMNS = (
+    InternshipForm.id,
+    InternshipForm.created_at,
+    InternshipForm.company_name,
+    InternshipForm.contact_name,
+    InternshipForm.contact_email,
+    InternshipForm.contact_phone,
+    InternshipForm.internship_positions,
+    InternshipForm.internship_topic1,
+)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(created_at, form_id):
+    """Encode a (created_at, id) keyset position into an opaque URL-safe token.
+
+    Args:
+        created_at: The creation timestamp of the boundary row
+        form_id: The primary key of the boundary row
+
+    Returns:
+        A URL-safe string identifying the position
+    """
+    raw = f'{created_at.isoformat()}|{form_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor.
+
+    Args:
+        cursor: The opaque cursor string
+
+    Returns:
+        A (created_at, id) tuple
+
+    Raises:
+        InvalidCursor: If the token is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        created_at, form_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(form_id)
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+class Page:
+    """A single page of a keyset-paginated listing.
+
+    Attributes:
+        items: The rows of the page, newest first
+        next_cursor: Cursor pointing to older rows, or None on the last page
+        prev_cursor: Cursor pointing to newer rows, or None on the first page
+    """
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def paginate_forms(query, per_page, after=None, before=None, columns=CARD_COLUMNS):
+    """Return one page of submissions ordered by (created_at, id) descending.
+
+    Pages are located with a keyset predicate on the (created_at, id) pair
+    instead of OFFSET, so the cost of fetching a page does not grow with
+    its position in the table.
+
+    Args:
+        query: The base InternshipForm query (filters may already be applied)
+        per_page: Maximum number of rows in the page
+        after: Cursor of the last row of the previous page (older rows follow)
+        before: Cursor of the first row of the next page (newer rows precede)
+        columns: Model columns to load; other attributes are deferred
+
+    Returns:
+        A Page instance
+    """
+    key = tuple_(InternshipForm.created_at, InternshipForm.id)
+    query = query.options(load_only(*columns))
+
+    if before is not None:
+        # Walk backwards towards newer rows, then restore display order
+        query = query.filter(key > tuple_(*decode_cursor(before)))
+        query = query.order_by(InternshipForm.created_at.asc(), InternshipForm.id.asc())
+        rows = query.limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_newer, has_older = has_more, True
+    else:
+        if after is not None:
+            query = query.filter(key < tuple_(*decode_cursor(after)))
+        query = query.order_by(InternshipForm.created_at.desc(), InternshipForm.id.desc())
+        rows = query.limit(per_page + 1).all()
+        items = rows[:per_page]
+        has_newer, has_older = after is not None, len(rows) > per_page
+
+    if not items:
+        return Page(items)
+
+    first, last = items[0], items[-1]
+    return Page(
+        items,
+        next_cursor=encode_cursor(last.created_at, last.id) if has_older else None,
+        prev_cursor=encode_cursor(first.created_at, first.id) if has_newer else None,
+    )
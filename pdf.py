@@ -0,0 +1,126 @@
+import textwrap
+
+# A4 portrait, in points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FONT_SIZE = 10
+LEADING = 14
+# Helvetica averages about half an em per character at this size
+WRAP_WIDTH = 95
+
+
+def _pdf_string(text):
+    """Encode `text` as a PDF literal string in the WinAnsi (cp1252) encoding."""
+    data = text.encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def build_text_pdf(title, lines):
+    """Build a plain-text PDF document without any third-party library.
+
+    Lines are wrapped to the page width and paginated; the title is repeated
+    in bold at the top of every page.
+
+    Args:
+        title: Heading printed on each page
+        lines: Iterable of text lines (empty strings produce blank lines)
+
+    Returns:
+        The PDF document as bytes
+    """
+    wrapped = []
+    for line in lines:
+        wrapped.extend(textwrap.wrap(line, WRAP_WIDTH, subsequent_indent='    ') or [''])
+
+    per_page = (PAGE_HEIGHT - 2 * MARGIN - 2 * LEADING) // LEADING
+    pages = [wrapped[i:i + per_page] for i in range(0, len(wrapped), per_page)] or [[]]
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # page tree, filled in once the page object numbers are known
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+    ]
+    page_refs = []
+    for page_lines in pages:
+        top = PAGE_HEIGHT - MARGIN
+        content = [
+            b'BT /F2 14 Tf %d %d Td %s Tj ET' % (MARGIN, top, _pdf_string(title)),
+            b'BT /F1 %d Tf %d TL %d %d Td' % (FONT_SIZE, LEADING, MARGIN, top - 2 * LEADING),
+        ]
+        for line in page_lines:
+            content.append(_pdf_string(line) + b' Tj T*')
+        content.append(b'ET')
+        stream = b'\n'.join(content)
+
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+            % (PAGE_WIDTH, PAGE_HEIGHT, len(objects))
+        )
+        page_refs.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(page_refs), len(page_refs))
+
+    output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        output += b'%010d 00000 n \n' % offset
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+def _yes_no(value):
+    return 'Oui' if value else 'Non'
+
+
+def form_pdf(form):
+    """Render the ESP internship form of a submission as a PDF.
+
+    Args:
+        form: The InternshipForm instance
+
+    Returns:
+        The PDF document as bytes
+    """
+    lines = [
+        f'Fiche n° {form.id} - soumise le {form.created_at:%d/%m/%Y à %H:%M}',
+        '',
+        "INFORMATIONS SUR L'ENTREPRISE",
+        f'Entreprise : {form.company_name}',
+        f'Adresse : {form.company_address}',
+        f'Téléphone : {form.contact_phone}',
+        f'Télécopie : {form.contact_fax or "-"}',
+        f'Email : {form.contact_email}',
+        '',
+        "CONTACT DANS L'ENTREPRISE",
+        f'Nom : {form.contact_name}',
+        f'Fonction : {form.contact_position}',
+        f'Téléphone direct : {form.contact_phone_direct or "-"}',
+        f'Télécopie directe : {form.contact_fax_direct or "-"}',
+        f'Email direct : {form.contact_email_direct or "-"}',
+        '',
+        'ÉTUDIANT CONCERNÉ',
+        f'Nom : {form.student_name or "-"}',
+        f'Prénoms : {form.student_firstname or "-"}',
+        '',
+        'DÉTAILS DU STAGE',
+        f'Nombre de places : {form.internship_positions or "-"}',
+    ]
+    for number, topic in enumerate(
+            (form.internship_topic1, form.internship_topic2, form.internship_topic3), start=1):
+        if topic:
+            lines.append(f'Sujet {number} : {topic}')
+    lines += [
+        f'Souhaite une rencontre : {_yes_no(form.wants_meeting)}',
+        f'Ne peut pas accueillir de stagiaire : {_yes_no(form.cannot_accept)}',
+        '',
+        f'Fait à : {form.signature_location or "-"}',
+    ]
+    return build_text_pdf('École Supérieure Polytechnique - Fiche de stage', lines)
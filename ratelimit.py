@@ -0,0 +1,239 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+from werkzeug.exceptions import TooManyRequests
+
+# Scopes checked by rate_limited(), in order: the client first, so a flood
+# from one address is refused before it can drain the global bucket
+SCOPES = ('ip', 'all')
+
+
+def parse_rate(value):
+    """Parse a 'count/seconds' rate such as '10/600'.
+
+    Returns:
+        A (capacity, period) tuple: bursts of up to `capacity` requests,
+        refilled at `capacity` requests per `period` seconds
+
+    Raises:
+        ValueError: If the rate is malformed
+    """
+    count, _, seconds = str(value).partition('/')
+    capacity, period = int(count), float(seconds or 1)
+    if capacity < 1 or period <= 0:
+        raise ValueError(f'Invalid rate: {value}')
+    return capacity, period
+
+
+def refill(tokens, updated, now, capacity, period):
+    """Take one token from a bucket last seen with `tokens` at time `updated`.
+
+    Returns:
+        (allowed, tokens left, seconds until a token is available)
+    """
+    rate = capacity / period
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryBuckets:
+    """Token buckets kept in the worker process.
+
+    Each worker enforces the limits on its own, so with N workers a client
+    may get up to N times the configured rate. The least recently used
+    buckets are dropped beyond `max_keys`; a dropped bucket starts full again.
+    """
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, period):
+        """Take one token from bucket `key`; see refill() for the result."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = refill(tokens, updated, now, capacity, period)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+class SQLiteBuckets:
+    """Token buckets stored in a SQLite file shared by the workers of a host.
+
+    The file is separate from the application database, so a flood of
+    rejected requests never competes with form submissions for the write
+    lock. Each take is one short IMMEDIATE transaction.
+    """
+
+    # Buckets idle for this long are full again and can be deleted
+    PURGE_AFTER = 86400
+    PURGE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._takes = 0
+        with self._connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS buckets '
+                               '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = OFF')
+            self._local.connection = connection
+        return _Transaction(connection)
+
+    def take(self, key, capacity, period):
+        """Take one token from bucket `key`; see refill() for the result."""
+        with self._connect() as connection:
+            # Wall-clock time: the file is shared by several processes
+            now = time.time()
+            row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry_after = refill(tokens, updated, now, capacity, period)
+            connection.execute(
+                'INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                (key, tokens, now)
+            )
+            self._takes += 1
+            if self._takes % self.PURGE_EVERY == 0:
+                connection.execute('DELETE FROM buckets WHERE updated < ?', (now - self.PURGE_AFTER,))
+        return allowed, retry_after
+
+
+class _Transaction:
+    """Run a block in BEGIN IMMEDIATE ... COMMIT on an autocommit connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+
+
+class RateLimiter:
+    """Named per-client and global limits checked against a bucket store.
+
+    Attributes:
+        limits: {name: {scope: (capacity, period)}}
+        counts: {(name, scope, outcome): count} for this process
+    """
+
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = limits
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def _count(self, name, scope, outcome):
+        with self._lock:
+            key = (name, scope, outcome)
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def check(self, name, client):
+        """Take a token for `client` from each bucket of limit `name`.
+
+        Returns:
+            None if the request may proceed, otherwise the number of seconds
+            the client should wait
+        """
+        for scope in SCOPES:
+            rate = self.limits[name].get(scope)
+            if rate is None:
+                continue
+            key = f'{name}:{client}' if scope == 'ip' else f'{name}:*'
+            allowed, retry_after = self.store.take(key, *rate)
+            if not allowed:
+                self._count(name, scope, 'limited')
+                return retry_after
+        self._count(name, 'all', 'allowed')
+        return None
+
+    def render_metrics(self):
+        """Return the counters as Prometheus exposition lines."""
+        lines = ['# HELP ratelimit_requests_total Requests checked by rate limits, by outcome.',
+                 '# TYPE ratelimit_requests_total counter']
+        with self._lock:
+            for (name, scope, outcome), count in sorted(self.counts.items()):
+                lines.append(f'ratelimit_requests_total{{limit="{name}",scope="{scope}",'
+                             f'outcome="{outcome}"}} {count}')
+        return lines
+
+
+def rate_limited(name):
+    """Refuse requests beyond limit `name` with 429 Too Many Requests.
+
+    Args:
+        name: A limit configured by init_ratelimit, e.g. 'submit'
+
+    Returns:
+        A view decorator; a no-op when rate limiting is disabled
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            limiter = current_app.extensions.get('ratelimit')
+            if limiter is not None:
+                retry_after = limiter.check(name, request.remote_addr or 'unknown')
+                if retry_after is not None:
+                    raise TooManyRequests(retry_after=math.ceil(retry_after))
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+def init_ratelimit(app):
+    """Set up the rate limits of `app`.
+
+    Does nothing unless RATELIMIT_ENABLED is set. RATELIMIT_STORAGE selects
+    the bucket store: 'memory' (per process) or 'sqlite' (shared by the
+    workers of a host through RATELIMIT_STORAGE_PATH). When instrumentation
+    is enabled, /metrics also reports the allowed and refused requests.
+
+    Args:
+        app: The Flask application instance
+    """
+    if not app.config.get('RATELIMIT_ENABLED'):
+        return
+
+    storage = app.config.get('RATELIMIT_STORAGE', 'memory')
+    if storage == 'memory':
+        store = MemoryBuckets(app.config.get('RATELIMIT_MAX_KEYS', 10000))
+    elif storage == 'sqlite':
+        store = SQLiteBuckets(app.config.get('RATELIMIT_STORAGE_PATH')
+                              or os.path.join(app.instance_path, 'ratelimit.db'))
+    else:
+        raise ValueError(f'Unknown RATELIMIT_STORAGE: {storage}')
+
+    limits = {'submit': {
+        'ip': parse_rate(app.config['RATELIMIT_SUBMIT_PER_IP']),
+        'all': parse_rate(app.config['RATELIMIT_SUBMIT_GLOBAL']),
+    }}
+    limiter = RateLimiter(store, limits)
+    app.extensions['ratelimit'] = limiter
+    if 'metrics' in app.extensions:
+        app.extensions['metrics'].register_collector(limiter.render_metrics)
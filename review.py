@@ -0,0 +1,181 @@
+import hmac
+from datetime import datetime
+from functools import wraps
+
+from flask import (current_app, flash, redirect, render_template, request, session, url_for,
+                   abort)
+from sqlalchemy import insert, or_, update
+
+from models import db, InternshipForm, FormReview, PENDING_REVIEW
+from pagination import paginate_forms, InvalidCursor
+from cache import response_cache
+from auth import admin_required
+from api import ApiError, api_response
+from forms import ReviewerLoginForm, ReviewForm
+
+# Review decisions and the is_approved value each one sets
+REVIEW_ACTIONS = {'approve': True, 'reject': False}
+
+
+def review_queue():
+    """Return the query of forms awaiting review (served by ix_internship_forms_review_queue)."""
+    return InternshipForm.query.filter(PENDING_REVIEW)
+
+
+def review_forms(form_ids, action, reviewer, note=None):
+    """Approve or reject many forms with one set-based UPDATE.
+
+    Forms are not loaded: a single UPDATE ... RETURNING changes every form
+    whose decision differs and reports their ids, which are then written to
+    the audit trail with one executemany INSERT. Forms already in the
+    requested state, and unknown ids, are left untouched.
+
+    Bulk UPDATEs bypass the ORM events, so the cached pages of the changed
+    forms are invalidated here after the commit. Their `updated_at` is
+    bumped, which also changes their ETag.
+
+    Args:
+        form_ids: Ids of the forms to review
+        action: One of REVIEW_ACTIONS
+        reviewer: Name recorded in the audit trail
+        note: Optional comment recorded with the decision
+
+    Returns:
+        The ids of the forms whose status changed
+    """
+    if action not in REVIEW_ACTIONS:
+        raise ValueError(f'Unknown review action: {action}')
+    if not form_ids:
+        return []
+
+    approve = REVIEW_ACTIONS[action]
+    now = datetime.utcnow()
+    table = InternshipForm.__table__
+    try:
+        changed = db.session.execute(
+            update(table)
+            .where(table.c.id.in_(set(form_ids)),
+                   or_(table.c.is_approved != approve, table.c.is_approved.is_(None),
+                       table.c.reviewed_at.is_(None)))
+            .values(is_approved=approve, reviewed_at=now, updated_at=now)
+            .returning(table.c.id)
+        ).scalars().all()
+        if changed:
+            db.session.execute(insert(FormReview.__table__), [
+                {'form_id': form_id, 'action': action, 'reviewer': reviewer,
+                 'note': note or None, 'created_at': now}
+                for form_id in changed
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for form_id in changed:
+        response_cache.invalidate_form(form_id)
+    return sorted(changed)
+
+
+def reviewer_required(view):
+    """Restrict a view to reviewers signed in through /admin/login."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_app.config.get('ADMIN_TOKEN'):
+            abort(403)
+        if not session.get('reviewer'):
+            return redirect(url_for('reviewer_login', next=request.full_path))
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def register_review(app):
+    """Register the reviewer login, the review queue and the review API.
+
+    Args:
+        app: The Flask application instance
+    """
+    @app.route('/admin/login', methods=['GET', 'POST'])
+    def reviewer_login():
+        """Sign a reviewer in with the shared ADMIN_TOKEN."""
+        if not app.config.get('ADMIN_TOKEN'):
+            abort(403)
+        form = ReviewerLoginForm()
+        if form.validate_on_submit():
+            if hmac.compare_digest(form.token.data.encode('utf-8'), app.config['ADMIN_TOKEN'].encode('utf-8')):
+                session['reviewer'] = form.reviewer.data.strip()
+                target = request.args.get('next', '')
+                # Only follow local paths, never another host
+                if not target.startswith('/') or target.startswith('//'):
+                    target = url_for('review_queue_page')
+                return redirect(target)
+            flash('Jeton administrateur invalide.', 'error')
+        return render_template('review_login.html', form=form, title='Connexion Relecteur')
+
+    @app.route('/admin/logout', methods=['POST'])
+    def reviewer_logout():
+        """Sign the reviewer out."""
+        session.pop('reviewer', None)
+        return redirect(url_for('index'))
+
+    @app.route('/admin/review', methods=['GET', 'POST'])
+    @reviewer_required
+    def review_queue_page():
+        """List forms awaiting review and apply bulk decisions to the checked ones."""
+        form = ReviewForm()
+        if form.validate_on_submit():
+            action = 'approve' if form.approve.data else 'reject'
+            form_ids = request.form.getlist('form_ids', type=int)[:app.config['REVIEW_MAX_IDS']]
+            changed = review_forms(form_ids, action, session['reviewer'], form.note.data)
+            verb = 'approuvée(s)' if action == 'approve' else 'rejetée(s)'
+            flash(f'{len(changed)} fiche(s) {verb}.', 'success')
+            return redirect(url_for('review_queue_page'))
+
+        per_page = request.args.get('per_page', app.config['REVIEW_PER_PAGE'], type=int)
+        per_page = max(1, min(per_page, app.config['REVIEW_MAX_IDS']))
+        try:
+            page = paginate_forms(review_queue(), per_page=per_page,
+                                  after=request.args.get('after'), before=request.args.get('before'))
+        except InvalidCursor:
+            abort(400)
+        return render_template('review_queue.html', form=form, forms=page.items, page=page,
+                               per_page=per_page, pending=review_queue().count(),
+                               title='Fiches à Valider')
+
+    @app.route('/api/v1/forms/review', methods=['POST'])
+    @admin_required
+    def api_review_forms():
+        """Approve or reject forms in bulk.
+
+        JSON body: `ids` (list of form ids), `action` ('approve' or 'reject'),
+        `reviewer` (recorded in the audit trail) and an optional `note`.
+        """
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            raise ApiError('Expected a JSON object')
+        action = payload.get('action')
+        if action not in REVIEW_ACTIONS:
+            raise ApiError('action must be "approve" or "reject"')
+        ids = payload.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise ApiError('ids must be a list of integers')
+        if len(ids) > app.config['REVIEW_MAX_IDS']:
+            raise ApiError(f'At most {app.config["REVIEW_MAX_IDS"]} ids per request')
+        reviewer = str(payload.get('reviewer') or 'api').strip()[:100]
+        note = payload.get('note')
+        if note is not None:
+            note = str(note)[:500]
+
+        changed = review_forms(ids, action, reviewer, note)
+        return api_response({'action': action, 'changed': changed})
+
+    @app.route('/api/v1/forms/<int:form_id>/reviews')
+    @admin_required
+    def api_form_reviews(form_id):
+        """Return the audit trail of one form, oldest decision first."""
+        reviews = FormReview.query.filter_by(form_id=form_id) \
+            .order_by(FormReview.created_at, FormReview.id).all()
+        return api_response({'data': [
+            {'action': review.action, 'reviewer': review.reviewer, 'note': review.note,
+             'created_at': review.created_at.isoformat()}
+            for review in reviews
+        ]})
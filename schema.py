@@ -0,0 +1,174 @@
+from sqlalchemy import exists, inspect, literal, select, text
+from sqlalchemy.schema import CreateTable
+
+from models import db, InternshipForm, ArchivedForm, WeeklyFormStats, CompanyFormStats
+from search import FTS_DDL, FTS_TABLE, rebuild_search_index
+from stats import rebuild_stats
+from dedupe import backfill_dedupe_keys
+
+
+class SchemaUpgradeError(RuntimeError):
+    """Raised when a model change cannot be applied in place."""
+
+
+def _column_ddl(column, dialect):
+    """Build the column definition used by ALTER TABLE ... ADD COLUMN.
+
+    Args:
+        column: The model's Column object
+        dialect: The SQLAlchemy dialect of the target database
+
+    Returns:
+        The column definition as a SQL string
+    """
+    preparer = dialect.identifier_preparer
+    ddl = f'{preparer.quote(column.name)} {column.type.compile(dialect=dialect)}'
+
+    default = None
+    if column.server_default is not None:
+        default = str(column.server_default.arg)
+    elif column.default is not None and column.default.is_scalar:
+        default = str(literal(column.default.arg, column.type).compile(
+            dialect=dialect, compile_kwargs={'literal_binds': True}
+        ))
+
+    if default is not None:
+        ddl += f' DEFAULT {default}'
+    if not column.nullable:
+        if default is None:
+            raise SchemaUpgradeError(
+                f'Cannot add NOT NULL column {column.table.name}.{column.name} without a default'
+            )
+        ddl += ' NOT NULL'
+    return ddl
+
+
+def reuses_form_ids(connection):
+    """Return True if SQLite may hand out the id of a deleted or archived form again.
+
+    Without AUTOINCREMENT, SQLite gives a new row the largest id in the
+    table plus one, so archiving the newest ids frees them for reuse.
+    """
+    if connection.dialect.name != 'sqlite':
+        return False
+    sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': InternshipForm.__tablename__}
+    ).scalar()
+    return sql is not None and 'AUTOINCREMENT' not in sql.upper()
+
+
+def _rebuild_forms_table(connection):
+    """Recreate internship_forms on SQLite with AUTOINCREMENT ids, keeping every row.
+
+    SQLite cannot add AUTOINCREMENT to an existing table: the table is
+    copied into a new one, swapped in, and its indexes and search triggers
+    recreated. The id sequence starts above every id in use, archived
+    forms included.
+    """
+    table = InternshipForm.__table__
+    has_search_index = FTS_TABLE in inspect(connection).get_table_names()
+    columns = ', '.join(connection.dialect.identifier_preparer.quote(c.name) for c in table.columns)
+    create = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.execute(text('DROP TABLE IF EXISTS internship_forms_rebuild'))
+    connection.execute(text(create.replace(f'CREATE TABLE {table.name} ', 'CREATE TABLE internship_forms_rebuild ', 1)))
+    connection.execute(text(f'INSERT INTO internship_forms_rebuild ({columns}) SELECT {columns} FROM {table.name}'))
+    connection.execute(text(f'DROP TABLE {table.name}'))
+    connection.execute(text(f'ALTER TABLE internship_forms_rebuild RENAME TO {table.name}'))
+    for index in table.indexes:
+        index.create(connection)
+    if has_search_index:
+        # Dropping the table dropped its triggers; the index itself is intact
+        for statement in FTS_DDL[1:]:
+            connection.execute(text(statement))
+    connection.execute(text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table.name})
+    connection.execute(text(
+        f'INSERT INTO sqlite_sequence (name, seq) SELECT :name, max('
+        f'(SELECT coalesce(max(id), 0) FROM {table.name}), '
+        f'(SELECT coalesce(max(id), 0) FROM {ArchivedForm.__tablename__}))'
+    ), {'name': table.name})
+
+
+def _stats_missing(connection):
+    """Return True if the statistics tables are empty although forms exist.
+
+    That is the state of a database whose summary tables were just created,
+    whether by this upgrade or by a create_all() that ran before it.
+    """
+    def has_rows(model):
+        return connection.execute(select(exists().select_from(model.__table__))).scalar()
+
+    return not (has_rows(WeeklyFormStats) or has_rows(CompanyFormStats)) \
+        and (has_rows(InternshipForm) or has_rows(ArchivedForm))
+
+
+def upgrade_schema(analyze=True):
+    """Bring an existing database up to date with the models without dropping data.
+
+    Missing tables are created, missing columns are added with ALTER TABLE and
+    missing indexes are built. Existing objects are never altered or removed,
+    so the command is safe to run repeatedly, e.g. on every deployment.
+
+    Args:
+        analyze: Refresh the query planner statistics afterwards
+
+    Returns:
+        A list of human-readable descriptions of the changes applied
+    """
+    engine = db.engine
+    changes = []
+
+    existing_tables = set(inspect(engine).get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            changes.append(f'create table {table.name}')
+    # create_all only creates what is missing (and fires after_create DDL hooks)
+    db.create_all()
+
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    connection.execute(text(
+                        f'ALTER TABLE {preparer.quote(table.name)} '
+                        f'ADD COLUMN {_column_ddl(column, engine.dialect)}'
+                    ))
+                    changes.append(f'add column {table.name}.{column.name}')
+
+            existing_indexes = {i['name'] for i in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                if index.name not in existing_indexes:
+                    index.create(connection)
+                    changes.append(f'create index {index.name}')
+
+    with engine.begin() as connection:
+        if reuses_form_ids(connection):
+            _rebuild_forms_table(connection)
+            changes.append(f'rebuild table {InternshipForm.__tablename__} with AUTOINCREMENT ids')
+
+    if engine.dialect.name == 'sqlite':
+        if FTS_TABLE not in inspect(engine).get_table_names():
+            rebuild_search_index()
+            changes.append(f'create search index {FTS_TABLE}')
+
+    if 'add column internship_forms.dedupe_key' in changes:
+        backfill_dedupe_keys()
+        changes.append('compute duplicate keys')
+
+    with engine.connect() as connection:
+        compute_stats = _stats_missing(connection)
+    if compute_stats:
+        rebuild_stats()
+        changes.append('compute statistics')
+
+    if analyze:
+        with engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+
+    return changes
@@ -0,0 +1,175 @@
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import DDL, event, or_, text
+from sqlalchemy.orm import load_only
+
+from models import db, InternshipForm
+from pagination import CARD_COLUMNS
+
+FTS_TABLE = 'internship_forms_fts'
+FTS_INSERT_TRIGGER = f'{FTS_TABLE}_ai'
+
+# Columns indexed for search, in FTS column order
+SEARCH_COLUMNS = (
+    'company_name',
+    'contact_name',
+    'contact_email',
+    'internship_topic1',
+    'internship_topic2',
+    'internship_topic3',
+)
+
+# bm25 weights matching SEARCH_COLUMNS: a hit on the company name ranks
+# above a hit on the contact, which ranks above a hit on a topic.
+RANK_WEIGHTS = (10.0, 5.0, 3.0, 1.0, 1.0, 1.0)
+
+_columns = ', '.join(SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+
+# External-content FTS5 table: the index stores only tokens, the text itself
+# stays in internship_forms. Triggers keep the index in sync on every write,
+# including bulk inserts that bypass the ORM.
+FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_columns}, content='internship_forms', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_INSERT_TRIGGER} AFTER INSERT ON internship_forms BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON internship_forms BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) "
+    f"VALUES ('delete', old.id, {_old_values}); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_columns} "
+    f"ON internship_forms BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) "
+    f"VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+)
+
+for _statement in FTS_DDL:
+    event.listen(
+        InternshipForm.__table__, 'after_create',
+        DDL(_statement).execute_if(dialect='sqlite')
+    )
+event.listen(
+    InternshipForm.__table__, 'after_drop',
+    DDL(f'DROP TABLE IF EXISTS {FTS_TABLE}').execute_if(dialect='sqlite')
+)
+
+
+def build_match_query(terms):
+    """Turn free-form user input into a safe FTS5 MATCH expression.
+
+    Every whitespace-separated term is quoted (so FTS operators typed by
+    users are treated as text) and made a prefix query. Terms are ANDed.
+
+    Args:
+        terms: The raw search string
+
+    Returns:
+        The MATCH expression, or an empty string if there is nothing to search
+    """
+    tokens = [t for t in re.split(r'\s+', terms.strip()) if t]
+    return ' '.join('"{}"*'.format(t.replace('"', '""')) for t in tokens)
+
+
+def rebuild_search_index():
+    """Create the FTS table and triggers if missing and reindex every row.
+
+    Used for databases created before search existed, or to repair the index.
+    Does nothing on non-SQLite backends.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return
+    with db.engine.begin() as connection:
+        for statement in FTS_DDL:
+            connection.execute(text(statement))
+        connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+@contextmanager
+def deferred_indexing(connection):
+    """Index the forms inserted inside the block with a single statement.
+
+    The insert trigger indexes rows one at a time, which costs about as much
+    as the insert itself during a bulk import. Inside the block the trigger
+    is dropped; the new rows are then indexed with one INSERT ... SELECT and
+    the trigger is recreated. Everything runs in the write transaction of
+    `connection` (started here if needed, so the DDL is not autocommitted
+    and no other writer can insert in between), hence a failure restores
+    the trigger on rollback.
+
+    Does nothing on non-SQLite backends or when the trigger does not exist.
+
+    Args:
+        connection: A SQLAlchemy Connection, e.g. db.session.connection()
+    """
+    if connection.dialect.name != 'sqlite' or connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (FTS_INSERT_TRIGGER,)
+    ).first() is None:
+        yield
+        return
+
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+    connection.exec_driver_sql(f'DROP TRIGGER {FTS_INSERT_TRIGGER}')
+    last_id = connection.exec_driver_sql('SELECT max(id) FROM internship_forms').scalar() or 0
+    yield
+    connection.exec_driver_sql(
+        f'INSERT INTO {FTS_TABLE}(rowid, {_columns}) '
+        f'SELECT id, {_columns} FROM internship_forms WHERE id > ?', (last_id,)
+    )
+    connection.exec_driver_sql(FTS_DDL[1])
+
+
+def search_forms(terms, limit=50):
+    """Search submissions by company, contact and internship topics.
+
+    Args:
+        terms: The raw search string
+        limit: Maximum number of results
+
+    Returns:
+        A list of InternshipForm objects with only the card columns loaded,
+        best match first
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return _search_forms_like(terms, limit)
+
+    match = build_match_query(terms)
+    if not match:
+        return []
+
+    weights = ', '.join(str(w) for w in RANK_WEIGHTS)
+    ids = db.session.execute(
+        text(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match '
+             f'ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT :limit'),
+        {'match': match, 'limit': limit}
+    ).scalars().all()
+    if not ids:
+        return []
+
+    forms = InternshipForm.query.options(load_only(*CARD_COLUMNS)).filter(
+        InternshipForm.id.in_(ids)
+    ).all()
+    by_id = {form.id: form for form in forms}
+    return [by_id[form_id] for form_id in ids if form_id in by_id]
+
+
+def _search_forms_like(terms, limit):
+    """Fallback search for backends without FTS5, using case-insensitive LIKE."""
+    tokens = [t for t in re.split(r'\s+', terms.strip()) if t]
+    if not tokens:
+        return []
+
+    query = InternshipForm.query.options(load_only(*CARD_COLUMNS))
+    for token in tokens:
+        pattern = f'%{token}%'
+        query = query.filter(or_(
+            *(getattr(InternshipForm, column).ilike(pattern) for column in SEARCH_COLUMNS)
+        ))
+    return query.order_by(InternshipForm.created_at.desc()).limit(limit).all()
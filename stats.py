@@ -0,0 +1,267 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from models import db, InternshipForm, ArchivedForm, WeeklyFormStats, CompanyFormStats
+
+# InternshipForm columns the counters are derived from
+STATS_COLUMNS = ('created_at', 'company_name', 'internship_positions', 'wants_meeting', 'cannot_accept')
+
+
+def week_start(value):
+    """Return the Monday of the week containing `value` (a date or datetime)."""
+    if isinstance(value, datetime):
+        value = value.date()
+    return value - timedelta(days=value.weekday())
+
+
+class StatsDelta:
+    """Accumulates counter changes so they are written with one upsert per key."""
+
+    def __init__(self):
+        # week_start -> [submissions, positions, wants_meeting, cannot_accept]
+        self.weeks = defaultdict(lambda: [0, 0, 0, 0])
+        # company_name -> [submissions, positions]
+        self.companies = defaultdict(lambda: [0, 0])
+
+    def add(self, values, sign=1):
+        """Count (sign=1) or uncount (sign=-1) one form given its STATS_COLUMNS values."""
+        positions = values['internship_positions'] or 0
+        week = self.weeks[week_start(values['created_at'] or datetime.utcnow())]
+        week[0] += sign
+        week[1] += sign * positions
+        week[2] += sign * bool(values['wants_meeting'])
+        week[3] += sign * bool(values['cannot_accept'])
+        company = self.companies[values['company_name'].strip()]
+        company[0] += sign
+        company[1] += sign * positions
+
+    def __bool__(self):
+        return bool(self.weeks or self.companies)
+
+    def apply(self, connection):
+        """Add the accumulated changes to the summary tables using `connection`."""
+        weeks = [
+            {'week_start': key, 'submissions': s, 'positions': p, 'wants_meeting': m, 'cannot_accept': c}
+            for key, (s, p, m, c) in self.weeks.items() if (s, p, m, c) != (0, 0, 0, 0)
+        ]
+        companies = [
+            {'company_name': key, 'submissions': s, 'positions': p}
+            for key, (s, p) in self.companies.items() if (s, p) != (0, 0)
+        ]
+        if weeks:
+            _upsert(connection, WeeklyFormStats.__table__, 'week_start', weeks)
+        if companies:
+            _upsert(connection, CompanyFormStats.__table__, 'company_name', companies)
+            removed = [row['company_name'] for row in companies if row['submissions'] < 0]
+            if removed:
+                table = CompanyFormStats.__table__
+                connection.execute(delete(table).where(
+                    table.c.company_name.in_(removed), table.c.submissions <= 0
+                ))
+        self.weeks.clear()
+        self.companies.clear()
+
+
+def _upsert(connection, table, key, rows):
+    """INSERT rows, adding their counters to those of existing rows with the same key."""
+    if connection.dialect.name == 'sqlite':
+        _upsert_sqlite(connection, table, key, rows)
+        return
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[key],
+        set_={column.name: column + statement.excluded[column.name]
+              for column in table.columns if column.name != key}
+    )
+    connection.execute(statement, rows)
+
+
+def _upsert_sqlite(connection, table, key, rows):
+    """_upsert() as one executemany of a textual statement.
+
+    A bulk import upserts one row per company; the Core statement spends
+    more time processing their parameters than SQLite spends upserting.
+    """
+    dialect = connection.dialect
+    preparer = dialect.identifier_preparer
+    columns = [column.name for column in table.columns]
+    processors = [dialect.type_descriptor(column.type).bind_processor(dialect) for column in table.columns]
+    counters = ', '.join(f'{preparer.quote(c)} = {preparer.quote(c)} + excluded.{preparer.quote(c)}'
+                         for c in columns if c != key)
+    statement = (
+        f'INSERT INTO {preparer.format_table(table)} ({", ".join(preparer.quote(c) for c in columns)}) '
+        f'VALUES ({", ".join("?" * len(columns))}) '
+        f'ON CONFLICT ({preparer.quote(key)}) DO UPDATE SET {counters}'
+    )
+    connection.exec_driver_sql(statement, [
+        tuple(processor(row[c]) if processor else row[c] for c, processor in zip(columns, processors))
+        for row in rows
+    ])
+
+
+def record_forms(rows):
+    """Count forms written with Core statements, which skip the ORM events.
+
+    Must be called in the transaction that inserted `rows`.
+
+    Args:
+        rows: Mappings with at least the STATS_COLUMNS keys
+    """
+    delta = StatsDelta()
+    for row in rows:
+        delta.add(row)
+    delta.apply(db.session.connection())
+
+
+def rebuild_stats():
+    """Recompute the summary tables in one transaction.
+
+    Forms moved to the archive files are counted from their archived_forms
+    index rows, so archiving does not change the statistics.
+
+    Returns:
+        The number of forms counted
+    """
+    delta = StatsDelta()
+    count = 0
+    for model in (InternshipForm, ArchivedForm):
+        columns = [getattr(model, name) for name in STATS_COLUMNS]
+        for row in db.session.execute(select(*columns).execution_options(yield_per=1000)).mappings():
+            delta.add(row)
+            count += 1
+
+    connection = db.session.connection()
+    connection.execute(delete(WeeklyFormStats.__table__))
+    connection.execute(delete(CompanyFormStats.__table__))
+    delta.apply(connection)
+    db.session.commit()
+    return count
+
+
+def _share(part, whole):
+    return round(part / whole, 4) if whole else 0.0
+
+
+def dashboard(weeks=12, top_companies=10, today=None):
+    """Read the dashboard figures from the summary tables.
+
+    The cost depends on the number of weeks and companies shown, never on
+    the number of submissions.
+
+    Args:
+        weeks: Number of recent weeks in the weekly series
+        top_companies: Number of companies in the ranking
+        today: Reference date of the weekly series (default: today, UTC)
+
+    Returns:
+        A JSON-serializable dictionary
+    """
+    submissions, positions, wants_meeting, cannot_accept = db.session.execute(select(
+        func.coalesce(func.sum(WeeklyFormStats.submissions), 0),
+        func.coalesce(func.sum(WeeklyFormStats.positions), 0),
+        func.coalesce(func.sum(WeeklyFormStats.wants_meeting), 0),
+        func.coalesce(func.sum(WeeklyFormStats.cannot_accept), 0),
+    )).one()
+
+    last_week = week_start(today or datetime.utcnow().date())
+    first_week = last_week - timedelta(weeks=weeks - 1)
+    recorded = {
+        row.week_start: row for row in WeeklyFormStats.query.filter(
+            WeeklyFormStats.week_start.between(first_week, last_week)
+        )
+    }
+    series = []
+    for offset in range(weeks):
+        key = first_week + timedelta(weeks=offset)
+        row = recorded.get(key)
+        series.append({
+            'week_start': key.isoformat(),
+            'submissions': row.submissions if row else 0,
+            'positions': row.positions if row else 0,
+        })
+
+    ranking = CompanyFormStats.query.filter(CompanyFormStats.submissions > 0).order_by(
+        CompanyFormStats.submissions.desc(), CompanyFormStats.company_name
+    ).limit(top_companies)
+
+    return {
+        'totals': {
+            'submissions': submissions,
+            'positions': positions,
+            'wants_meeting': wants_meeting,
+            'cannot_accept': cannot_accept,
+            'wants_meeting_share': _share(wants_meeting, submissions),
+            'cannot_accept_share': _share(cannot_accept, submissions),
+        },
+        'weeks': series,
+        'top_companies': [
+            {'company_name': row.company_name, 'submissions': row.submissions, 'positions': row.positions}
+            for row in ranking
+        ],
+    }
+
+
+def _pending_delta(db_session):
+    delta = db_session.info.get('stats_delta')
+    if delta is None:
+        delta = db_session.info['stats_delta'] = StatsDelta()
+    return delta
+
+
+def _track_old_values(target, value, oldvalue, initiator):
+    """No-op 'set' listener registered with active_history (see below)."""
+
+
+# Make sure the previous value of every counted column is loaded before it is
+# overwritten, even on expired instances, so updates can uncount it.
+for _name in STATS_COLUMNS:
+    event.listen(getattr(InternshipForm, _name), 'set', _track_old_values, active_history=True)
+
+
+@event.listens_for(InternshipForm, 'after_insert')
+def _count_inserted_form(mapper, connection, target):
+    _pending_delta(Session.object_session(target)).add(
+        {name: getattr(target, name) for name in STATS_COLUMNS}
+    )
+
+
+@event.listens_for(InternshipForm, 'after_update')
+def _recount_updated_form(mapper, connection, target):
+    state = inspect(target)
+    histories = {name: state.attrs[name].history for name in STATS_COLUMNS}
+    if not any(history.deleted for history in histories.values()):
+        return
+    old = {name: history.deleted[0] if history.deleted else getattr(target, name)
+           for name, history in histories.items()}
+    delta = _pending_delta(Session.object_session(target))
+    delta.add(old, sign=-1)
+    delta.add({name: getattr(target, name) for name in STATS_COLUMNS})
+
+
+@event.listens_for(InternshipForm, 'after_delete')
+def _uncount_deleted_form(mapper, connection, target):
+    state = inspect(target)
+    old = {name: state.attrs[name].history.deleted[0] if state.attrs[name].history.deleted
+           else getattr(target, name) for name in STATS_COLUMNS}
+    _pending_delta(Session.object_session(target)).add(old, sign=-1)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_stats_delta(db_session, flush_context):
+    delta = db_session.info.get('stats_delta')
+    if delta:
+        # Same connection and transaction as the flushed rows
+        delta.apply(db_session.connection())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stats_delta(db_session):
+    db_session.info.pop('stats_delta', None)
@@ -0,0 +1,104 @@
+import os
+
+from flask import current_app
+
+from jobs import enqueue, job_handler
+from models import db, InternshipForm
+
+
+def form_pdf_path(form_id):
+    """Return where the PDF copy of submission `form_id` is stored."""
+    directory = current_app.config.get('FORM_PDF_DIR') or os.path.join(current_app.instance_path, 'pdfs')
+    return os.path.join(directory, f'fiche-stage-{form_id}.pdf')
+
+
+def load_form_pdf(form, refresh=False):
+    """Return the stored PDF copy of `form`, generating it when missing.
+
+    Args:
+        form: The InternshipForm instance
+        refresh: Regenerate the file even if it exists
+
+    Returns:
+        The PDF document as bytes
+    """
+    path = form_pdf_path(form.id)
+    if not refresh and os.path.exists(path):
+        with open(path, 'rb') as handle:
+            return handle.read()
+
+    from pdf import form_pdf
+
+    data = form_pdf(form)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so concurrent jobs never read a partial file
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as handle:
+        handle.write(data)
+    os.replace(temp_path, path)
+    return data
+
+
+def enqueue_submission_jobs(form_id):
+    """Queue the post-submission work for a new form in the current transaction."""
+    enqueue('generate_form_pdf', form_id=form_id)
+    enqueue('notify_department', form_id=form_id)
+    enqueue('confirm_submission', form_id=form_id)
+
+
+def _pdf_attachment(form):
+    return (os.path.basename(form_pdf_path(form.id)), 'application/pdf', load_form_pdf(form))
+
+
+@job_handler('generate_form_pdf')
+def generate_form_pdf(form_id):
+    """Store a PDF copy of the ESP internship form."""
+    form = db.session.get(InternshipForm, form_id)
+    if form is not None:
+        load_form_pdf(form, refresh=True)
+
+
+@job_handler('notify_department')
+def notify_department(form_id):
+    """Email the department about a new submission, with the PDF attached."""
+    from mail import build_message, send_message
+
+    recipient = current_app.config.get('MAIL_DEPARTMENT_ADDRESS')
+    form = db.session.get(InternshipForm, form_id)
+    if not recipient or form is None:
+        return
+
+    body = (
+        f'Une nouvelle fiche de stage a été soumise par {form.company_name}.\n\n'
+        f'Contact : {form.contact_name} ({form.contact_position})\n'
+        f'Email : {form.contact_email}\n'
+        f'Téléphone : {form.contact_phone}\n'
+        f'Nombre de places : {form.internship_positions or "-"}\n\n'
+        'La fiche complète est jointe à ce message.\n'
+    )
+    send_message(build_message(
+        f'Nouvelle fiche de stage : {form.company_name}', [recipient], body,
+        attachments=[_pdf_attachment(form)]
+    ))
+
+
+@job_handler('confirm_submission')
+def confirm_submission(form_id):
+    """Send the company contact a confirmation with a copy of their form."""
+    from mail import build_message, send_message
+
+    form = db.session.get(InternshipForm, form_id)
+    if form is None:
+        return
+
+    body = (
+        f'Bonjour {form.contact_name},\n\n'
+        "Nous avons bien reçu votre fiche de stage pour l'École Supérieure Polytechnique "
+        f'(référence n° {form.id}). Vous en trouverez une copie en pièce jointe.\n\n'
+        'Le service des stages reviendra vers vous prochainement.\n\n'
+        "Cordialement,\nLe service des stages de l'ESP\n"
+    )
+    send_message(build_message(
+        'Confirmation de réception de votre fiche de stage', [form.contact_email], body,
+        attachments=[_pdf_attachment(form)]
+    ))
@@ -0,0 +1,87 @@
+import os
+from collections import namedtuple
+
+from flask import url_for
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import escape
+
+# Display-ready fields of one card of the submissions list. Every value is
+# HTML-escaped by form_cards(), so the card macro can output them as is.
+FormCard = namedtuple('FormCard', (
+    'url', 'company_name', 'positions_label', 'contact_name', 'contact_email',
+    'contact_phone', 'internship_topic1', 'created_label',
+))
+
+
+def form_cards(forms):
+    """Prepare the cards of the submissions list.
+
+    Formatting and escaping happen here, once per distinct value, instead of
+    in the template loop: dates are formatted once per day, repeated names
+    and topics are escaped once, and the detail URL is built once and
+    completed with each id, since a url_for() call costs about as much as
+    rendering the rest of a card.
+
+    Args:
+        forms: InternshipForm objects with at least the card columns loaded
+
+    Returns:
+        A list of FormCard tuples, in the same order
+    """
+    # The form id is the last segment of the view_form URL
+    url_prefix = url_for('view_form', form_id=0)[:-1]
+    dates = {}
+    escaped = {None: ''}
+
+    def html(value):
+        text = escaped.get(value)
+        if text is None:
+            text = escaped[value] = str(escape(value))
+        return text
+
+    cards = []
+    for form in forms:
+        created_at = form.created_at
+        created_label = dates.get(created_at.date())
+        if created_label is None:
+            created_label = dates[created_at.date()] = created_at.strftime('%d %b %Y')
+        if form.internship_positions:
+            positions_label = f'{form.internship_positions} position(s) disponible(s)'
+        else:
+            positions_label = 'Positions non spécifiées'
+        cards.append(FormCard._make(map(html, (
+            f'{url_prefix}{form.id}', form.company_name, positions_label, form.contact_name,
+            form.contact_email, form.contact_phone, form.internship_topic1, created_label,
+        ))))
+    return cards
+
+
+def compile_templates(app):
+    """Compile every template of `app` into its bytecode cache.
+
+    Run at deployment time (`flask templates-compile`) so that workers load
+    compiled templates instead of parsing them on their first request.
+
+    Returns:
+        The names of the compiled templates
+    """
+    names = sorted(name for name in app.jinja_env.list_templates() if name.endswith('.html'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+def init_templates(app):
+    """Store compiled templates in a FileSystemBytecodeCache when enabled.
+
+    Compiled templates are keyed by the checksum of their source, so an
+    edited template is recompiled, never served stale.
+
+    Args:
+        app: The Flask application instance
+    """
+    if not app.config.get('TEMPLATE_BYTECODE_CACHE'):
+        return
+    directory = app.config.get('TEMPLATE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja')
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
@@ -5,8 +5,15 @@ import datetime
 from flask import Flask
 
 from app import create_app
+from config import TestingConfig
 from models import db, InternshipForm
 
+# Tests of SQLite-only features, skipped when TEST_DATABASE_URL selects PostgreSQL
+sqlite_only = pytest.mark.skipif(
+    not TestingConfig.SQLALCHEMY_DATABASE_URI.startswith('sqlite'),
+    reason='requires the SQLite backend'
+)
+
 class TestConfig:
     """Test configuration."""
     TESTING = True
@@ -139,4 +146,1139 @@ def test_form_detail_view(client):
 def test_nonexistent_form_view(client):
     """Test if trying to view a nonexistent form returns 404."""
     response = client.get('/forms/999')  # Assuming ID 999 doesn't exist
-    assert response.status_code == 404 
\ No newline at end of file
+    assert response.status_code == 404 
+
+def _create_forms(count, start=None):
+    """Insert `count` minimal forms with increasing creation timestamps."""
+    start = start or datetime.datetime(2024, 1, 1)
+    forms = []
+    for i in range(count):
+        form = InternshipForm(
+            company_name=f'Company {i:03d}',
+            company_address='123 Test Street',
+            contact_phone='123-456-7890',
+            contact_email=f'contact{i}@example.com',
+            contact_name='John Doe',
+            contact_position='HR Manager',
+            created_at=start + datetime.timedelta(minutes=i)
+        )
+        db.session.add(form)
+        forms.append(form)
+    db.session.commit()
+    return forms
+
+def test_form_list_keyset_pagination(app):
+    """Test that cursors walk the listing without gaps or duplicates."""
+    from pagination import paginate_forms
+
+    _create_forms(7)
+    first = paginate_forms(InternshipForm.query, per_page=3)
+    assert [f.company_name for f in first.items] == ['Company 006', 'Company 005', 'Company 004']
+    assert first.prev_cursor is None
+
+    second = paginate_forms(InternshipForm.query, per_page=3, after=first.next_cursor)
+    third = paginate_forms(InternshipForm.query, per_page=3, after=second.next_cursor)
+    assert [f.company_name for f in third.items] == ['Company 000']
+    assert third.next_cursor is None
+
+    back = paginate_forms(InternshipForm.query, per_page=3, before=third.prev_cursor)
+    assert [f.id for f in back.items] == [f.id for f in second.items]
+    assert back.prev_cursor is not None
+
+def test_form_list_page_links(client):
+    """Test that /forms renders a page and a link to the next one."""
+    with client.application.app_context():
+        _create_forms(3)
+    response = client.get('/forms?per_page=2')
+    assert response.status_code == 200
+    assert b'Company 002' in response.data
+    assert b'Company 000' not in response.data
+    assert b'after=' in response.data
+
+def test_form_list_invalid_cursor(client):
+    """Test that a malformed cursor is rejected."""
+    response = client.get('/forms?after=not-a-cursor')
+    assert response.status_code == 400
+
+def test_search_match_query_escapes_operators():
+    """Test that user input cannot inject FTS5 syntax."""
+    from search import build_match_query
+
+    assert build_match_query('  acme  dev ') == '"acme"* "dev"*'
+    assert build_match_query('a"b OR') == '"a""b"* "OR"*'
+    assert build_match_query('   ') == ''
+
+@sqlite_only
+def test_search_forms_prefix_and_sync(app):
+    """Test prefix search and that the index follows updates and deletes."""
+    from search import search_forms
+
+    forms = _create_forms(3)
+    forms[1].internship_topic1 = 'Développement web'
+    db.session.commit()
+
+    assert [f.id for f in search_forms('develop')] == [forms[1].id]
+    assert [f.id for f in search_forms('compa 002')] == [forms[2].id]
+
+    forms[1].internship_topic1 = 'Réseaux'
+    db.session.commit()
+    assert search_forms('develop') == []
+
+    db.session.delete(forms[2])
+    db.session.commit()
+    assert search_forms('002') == []
+
+def test_search_api(client):
+    """Test the JSON search endpoint and the server-side list filter."""
+    with client.application.app_context():
+        _create_forms(2)
+    response = client.get('/forms/search?q=contact1')
+    assert response.status_code == 200
+    assert [r['company_name'] for r in response.get_json()['results']] == ['Company 001']
+
+    response = client.get('/forms?q=contact1')
+    assert b'Company 001' in response.data
+    assert b'Company 000' not in response.data
+
+def test_upgrade_schema_adds_missing_indexes_and_columns(app):
+    """Test that an outdated database is upgraded in place without data loss."""
+    from sqlalchemy import inspect, text
+    from schema import upgrade_schema
+
+    _create_forms(2)
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP INDEX ix_internship_forms_company_name'))
+        connection.execute(text('ALTER TABLE internship_forms DROP COLUMN signature_location'))
+
+    changes = upgrade_schema()
+    assert 'add column internship_forms.signature_location' in changes
+    assert 'create index ix_internship_forms_company_name' in changes
+
+    indexes = {i['name'] for i in inspect(db.engine).get_indexes('internship_forms')}
+    assert 'ix_internship_forms_company_name' in indexes
+    assert InternshipForm.query.count() == 2
+    assert upgrade_schema() == []
+
+def test_upgrade_schema_fills_empty_stats_tables(app):
+    """Test that statistics tables created before the upgrade (e.g. by create_all) are filled."""
+    from sqlalchemy import delete
+    from models import WeeklyFormStats, CompanyFormStats
+    from schema import upgrade_schema
+
+    _create_forms(2)
+    db.session.execute(delete(WeeklyFormStats.__table__))
+    db.session.execute(delete(CompanyFormStats.__table__))
+    db.session.commit()
+
+    assert upgrade_schema() == ['compute statistics']
+    assert db.session.query(db.func.sum(WeeklyFormStats.submissions)).scalar() == 2
+    assert upgrade_schema() == []
+
+def _import_record(i, **overrides):
+    """Build a valid bulk import record."""
+    record = {
+        'company_name': f'Imported {i}',
+        'company_address': '1 Avenue Cheikh Anta Diop',
+        'contact_phone': '338250000',
+        'contact_email': f'import{i}@example.com',
+        'contact_name': 'Awa Ndiaye',
+        'contact_position': 'DRH',
+        'internship_positions': 2,
+        'wants_meeting': 'non',
+    }
+    record.update(overrides)
+    return record
+
+def test_import_forms_validates_and_batches(app):
+    """Test that invalid records are reported and valid ones inserted in batches."""
+    import io
+    import json
+    from importer import import_forms
+
+    records = [
+        _import_record(1, created_at='2019-03-04T10:00:00'),
+        _import_record(2, contact_email='not-an-email'),
+        _import_record(3, wants_meeting=True),
+        _import_record(4, internship_positions='--5'),
+        _import_record(5, internship_positions='²'),
+    ]
+    stream = io.StringIO('\n'.join(json.dumps(r) for r in records))
+    result = import_forms(stream, 'jsonl', batch_size=1)
+
+    assert result.inserted == 2
+    assert [number for number, _ in result.errors] == [2, 4, 5]
+    assert 'contact_email' in result.errors[0][1]
+    assert 'internship_positions' in result.errors[1][1]
+
+    first = InternshipForm.query.filter_by(company_name='Imported 1').one()
+    assert first.created_at == datetime.datetime(2019, 3, 4, 10)
+    assert first.wants_meeting is False
+    assert InternshipForm.query.filter_by(company_name='Imported 3').one().wants_meeting is True
+
+def test_import_forms_streams_json_array_and_csv(app):
+    """Test the JSON array and CSV readers."""
+    import io
+    import json
+    from importer import import_forms
+
+    array = json.dumps([_import_record(i) for i in range(5)])
+    assert import_forms(io.StringIO(array), 'json').inserted == 5
+
+    csv_data = 'company_name,company_address,contact_phone,contact_email,contact_name,contact_position\n' \
+               'Csv Co,1 Rue Carnot,338250000,csv@example.com,Moussa Diop,DG\n'
+    assert import_forms(io.StringIO(csv_data), 'csv').inserted == 1
+    assert InternshipForm.query.count() == 6
+
+@sqlite_only
+def test_import_indexes_batches_for_search(app, monkeypatch):
+    """Test that imported batches are searchable and the insert trigger survives."""
+    import io
+    import json
+    import importer
+    from search import FTS_TABLE, FTS_INSERT_TRIGGER, search_forms
+
+    def insert_trigger_exists():
+        return db.session.execute(
+            db.text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"),
+            {'name': FTS_INSERT_TRIGGER}
+        ).first() is not None
+
+    stream = io.StringIO('\n'.join(json.dumps(_import_record(i)) for i in range(3)))
+    assert importer.import_forms(stream, 'jsonl', batch_size=2).inserted == 3
+    assert sorted(f.company_name for f in search_forms('imported')) == ['Imported 0', 'Imported 1', 'Imported 2']
+    assert insert_trigger_exists()
+    db.session.execute(db.text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('integrity-check')"))
+
+    # A failed batch rolls back the rows and the dropped trigger alike
+    def fail(rows):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(importer, 'record_forms', fail)
+    with pytest.raises(RuntimeError):
+        importer.import_forms(io.StringIO(json.dumps(_import_record(9))), 'jsonl')
+    assert insert_trigger_exists()
+    assert InternshipForm.query.count() == 3
+
+    db.session.add(InternshipForm(company_name='Après Import', company_address='1 Rue Carnot',
+                                  contact_phone='338250000', contact_email='rh@apres.sn',
+                                  contact_name='Moussa Diop', contact_position='DG'))
+    db.session.commit()
+    assert [f.company_name for f in search_forms('apres')] == ['Après Import']
+
+def test_import_endpoint_requires_token(client):
+    """Test that the bulk import endpoint is authenticated."""
+    import json
+
+    body = json.dumps(_import_record(1))
+    headers = {'Content-Type': 'application/x-ndjson'}
+    assert client.post('/forms/import', data=body, headers=headers).status_code == 403
+
+    client.application.config['ADMIN_TOKEN'] = 'secret'
+    assert client.post('/forms/import', data=body, headers=headers).status_code == 401
+    wrong = dict(headers, Authorization='Bearer é')
+    assert client.post('/forms/import', data=body, headers=wrong).status_code == 401
+
+    headers['Authorization'] = 'Bearer secret'
+    response = client.post('/forms/import', data=body, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == 1
+
+def test_export_csv_and_jsonl_with_filters(client):
+    """Test streamed exports and their date/approval filters."""
+    import csv
+    import io
+    import json
+
+    with client.application.app_context():
+        forms = _create_forms(3, start=datetime.datetime(2024, 1, 1))
+        forms[2].is_approved = True
+        db.session.commit()
+
+    response = client.get('/forms/export?format=csv')
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'].startswith('attachment;')
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True).lstrip('\ufeff'))))
+    assert [r['company_name'] for r in rows] == ['Company 000', 'Company 001', 'Company 002']
+
+    response = client.get('/forms/export?format=jsonl&approved=true')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r['company_name'] for r in lines] == ['Company 002']
+    assert lines[0]['created_at'] == '2024-01-01T00:02:00'
+
+    response = client.get('/forms/export?format=jsonl&since=2024-01-02')
+    assert response.get_data(as_text=True) == ''
+
+def test_export_rejects_bad_parameters(client):
+    """Test that invalid formats and filters return 400."""
+    assert client.get('/forms/export?format=pdf').status_code == 400
+    assert client.get('/forms/export?since=yesterday').status_code == 400
+
+def test_view_form_cache_and_conditional_get(client):
+    """Test ETag revalidation and invalidation when a form is updated."""
+    with client.application.app_context():
+        form_id = _create_forms(1)[0].id
+
+    response = client.get(f'/forms/{form_id}')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Last-Modified']
+
+    response = client.get(f'/forms/{form_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    with client.application.app_context():
+        form = db.session.get(InternshipForm, form_id)
+        form.company_name = 'Renamed Company'
+        db.session.commit()
+
+    response = client.get(f'/forms/{form_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'Renamed Company' in response.data
+    assert response.headers['ETag'] != etag
+
+def test_list_cache_invalidated_on_insert(client):
+    """Test that cached list pages are retired when a form is added."""
+    with client.application.app_context():
+        _create_forms(1)
+    assert b'Company 000' in client.get('/forms').data
+
+    with client.application.app_context():
+        _create_forms(1, start=datetime.datetime(2025, 1, 1))
+    # The second batch reuses the name 'Company 000'; count the cards instead
+    assert client.get('/forms').data.count(b'class="form-card"') == 2
+
+def test_memory_cache_lru_and_ttl():
+    """Test eviction order and expiry of the in-process backend."""
+    from cache import MemoryCache
+
+    cache = MemoryCache(max_entries=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+
+    expired = MemoryCache(ttl=-1)
+    expired.set('a', 1)
+    assert expired.get('a') is None
+
+def test_filesystem_cache_prunes_files(tmp_path):
+    """Test that the filesystem backend caps its files and deletes expired ones."""
+    import time
+    from cache import FileSystemCache
+
+    cache = FileSystemCache(str(tmp_path), ttl=60, max_entries=3, pinned=('pinned',))
+    for key in ('pinned', 'a', 'b', 'c'):
+        cache.set(key, key)
+    assert len(os.listdir(tmp_path)) == 3
+    assert cache.get('a') is None
+    assert [cache.get(key) for key in ('pinned', 'b', 'c')] == ['pinned', 'b', 'c']
+
+    old = time.time() - 120
+    os.utime(cache._path('b'), (old, old))
+    FileSystemCache(str(tmp_path), ttl=60, max_entries=3).set('d', 'd')
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(cache._path(k))
+                                                  for k in ('pinned', 'c', 'd'))
+
+def test_filesystem_cache_skips_search_pages(app, tmp_path):
+    """Test that search result pages do not add files to the filesystem backend."""
+    from cache import response_cache
+
+    app.config.update(RESPONSE_CACHE_TYPE='filesystem', RESPONSE_CACHE_DIR=str(tmp_path))
+    response_cache.init_app(app)
+    client = app.test_client()
+    assert client.get('/forms?q=company').status_code == 200
+    assert os.listdir(tmp_path) == []
+    assert client.get('/forms').status_code == 200
+    assert len(os.listdir(tmp_path)) == 1
+
+@sqlite_only
+def test_sqlite_pragmas_applied(app):
+    """Test that new SQLite connections use WAL journaling and relaxed fsync."""
+    from sqlalchemy import text
+
+    with db.engine.connect() as connection:
+        assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert connection.execute(text('PRAGMA synchronous')).scalar() == 1
+        assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 30000
+
+def test_engine_options_from_config():
+    """Test pool settings for file databases and none for in-memory SQLite."""
+    from database import engine_options
+
+    config = {'SQLALCHEMY_DATABASE_URI': 'sqlite:///forms.db', 'SQLALCHEMY_POOL_SIZE': 8,
+              'SQLALCHEMY_ENGINE_OPTIONS': {'pool_recycle': 60}}
+    options = engine_options(config)
+    assert options['pool_size'] == 8
+    assert options['pool_recycle'] == 60
+    assert options['connect_args']['timeout'] == 30
+
+    options = engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    assert 'pool_size' not in options
+
+def test_instrumentation_server_timing_and_metrics(app, monkeypatch):
+    """Test the Server-Timing header and /metrics counters when enabled."""
+    from config import config_by_name
+
+    monkeypatch.setattr(config_by_name['testing'], 'INSTRUMENTATION_ENABLED', True, raising=False)
+    instrumented = create_app('testing')
+    instrumented.config.from_object(TestConfig)
+    client = instrumented.test_client()
+
+    response = client.get('/forms')
+    timing = response.headers['Server-Timing']
+    assert 'app;dur=' in timing and 'db;dur=' in timing and 'tpl;dur=' in timing
+
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{endpoint="list_forms",method="GET",status="200"} 1' in metrics
+    assert 'sql_statements_total{endpoint="list_forms"}' in metrics
+    assert 'http_request_duration_seconds_bucket{endpoint="list_forms",le="+Inf"} 1' in metrics
+
+def test_instrumentation_disabled_by_default(client):
+    """Test that no timing header or metrics endpoint exists by default."""
+    response = client.get('/')
+    assert 'Server-Timing' not in response.headers
+    assert client.get('/metrics').status_code == 404
+
+def test_slow_request_profiler_keeps_slowest(tmp_path):
+    """Test that only the slowest sampled profiles are kept on disk."""
+    import cProfile
+    from instrumentation import SlowRequestProfiler
+
+    profiler = SlowRequestProfiler(str(tmp_path), keep=2)
+    for duration in (0.5, 0.1, 0.9, 0.05):
+        profiler.save(cProfile.Profile(), duration, 'list_forms')
+
+    kept = sorted(os.listdir(tmp_path))
+    assert len(kept) == 2
+    assert kept[0].startswith('00000500ms') and kept[1].startswith('00000900ms')
+
+def test_submission_enqueues_background_jobs(client, app, tmp_path):
+    """Test that a submission queues its emails and PDF copy, run by the worker."""
+    import mail
+    from jobs import run_pending
+    from models import Job
+
+    app.config.update(FORM_PDF_DIR=str(tmp_path), MAIL_DEPARTMENT_ADDRESS='stages@esp.sn')
+    mail.outbox.clear()
+    response = client.post('/submit', data={
+        'company_name': 'Sonatel',
+        'company_address': '46 Boulevard de la République',
+        'contact_phone': '338391200',
+        'contact_email': 'rh@sonatel.sn',
+        'contact_name': 'Awa Ndiaye',
+        'contact_position': 'DRH',
+    })
+    assert response.status_code == 302
+    assert mail.outbox == []
+    assert sorted(job.kind for job in Job.query.filter_by(status='pending')) == [
+        'confirm_submission', 'generate_form_pdf', 'notify_department'
+    ]
+
+    assert run_pending() == 3
+    assert Job.query.filter(Job.status != 'done').count() == 0
+    assert sorted(message['To'] for message in mail.outbox) == ['rh@sonatel.sn', 'stages@esp.sn']
+    attachment = next(mail.outbox[0].iter_attachments())
+    assert attachment.get_content_type() == 'application/pdf'
+    assert attachment.get_content().startswith(b'%PDF-1.4')
+
+    form_id = InternshipForm.query.filter_by(company_name='Sonatel').one().id
+    pdf = client.get(f'/forms/{form_id}/pdf')
+    assert pdf.mimetype == 'application/pdf'
+    assert pdf.data.rstrip().endswith(b'%%EOF')
+
+def test_idle_job_poll_only_reads_and_stale_jobs_are_released(app):
+    """Test that polling without due jobs writes nothing, and that abandoned jobs are rerun."""
+    from sqlalchemy import event
+    from jobs import claim_jobs, enqueue
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        assert claim_jobs(10) == []
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert statements and set(statements) == {'SELECT'}
+
+    job = enqueue('test_noop')
+    db.session.commit()
+    assert claim_jobs(10) == [job.id]
+    assert claim_jobs(10) == []
+    job.locked_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=app.config['JOBS_LOCK_TIMEOUT'] + 1)
+    db.session.commit()
+    assert claim_jobs(10) == [job.id]
+    db.session.refresh(job)
+    assert job.status == 'running' and job.attempts == 2
+
+def test_failing_job_retries_with_backoff(app):
+    """Test that failed jobs are rescheduled with exponential backoff, then given up."""
+    from jobs import HANDLERS, enqueue, run_pending
+
+    calls = []
+
+    def flaky(**payload):
+        calls.append(payload)
+        raise ConnectionError('SMTP server unavailable')
+
+    HANDLERS['test_flaky'] = flaky
+    try:
+        job = enqueue('test_flaky', max_attempts=2, form_id=1)
+        db.session.commit()
+
+        assert run_pending() == 1
+        db.session.refresh(job)
+        assert job.status == 'pending' and job.attempts == 1
+        assert 'SMTP server unavailable' in job.last_error
+        delay = (job.run_at - datetime.datetime.utcnow()).total_seconds()
+        assert app.config['JOBS_RETRY_BASE_DELAY'] - 5 < delay <= app.config['JOBS_RETRY_BASE_DELAY']
+        assert run_pending() == 0
+
+        job.run_at = datetime.datetime.utcnow()
+        db.session.commit()
+        assert run_pending() == 1
+        db.session.refresh(job)
+        assert job.status == 'failed' and job.attempts == 2
+        assert calls == [{'form_id': 1}, {'form_id': 1}]
+    finally:
+        del HANDLERS['test_flaky']
+
+@pytest.fixture
+def smtp_server():
+    """Run a minimal SMTP server on 127.0.0.1 that keeps the messages it receives."""
+    import email
+    import socketserver
+    import threading
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            self.wfile.write(b'220 localhost ESMTP\r\n')
+            data = None
+            for line in self.rfile:
+                if data is not None:
+                    if line.rstrip(b'\r\n') == b'.':
+                        self.server.messages.append(email.message_from_bytes(b''.join(data)))
+                        data = None
+                        self.wfile.write(b'250 OK\r\n')
+                    else:
+                        data.append(line[1:] if line.startswith(b'..') else line)
+                    continue
+                verb = line[:4].upper()
+                if verb == b'DATA':
+                    data = []
+                    self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                elif verb == b'QUIT':
+                    self.wfile.write(b'221 Bye\r\n')
+                    return
+                else:
+                    self.wfile.write(b'250 OK\r\n')
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_jobs_send_email_over_smtp(client, app, tmp_path, smtp_server):
+    """Test that both notification emails reach an SMTP server, line breaks in names included."""
+    from jobs import run_pending
+    from models import Job
+
+    app.config.update(MAIL_BACKEND='smtp', MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp_server.server_address[1],
+                      MAIL_USE_TLS=False, MAIL_USERNAME=None, FORM_PDF_DIR=str(tmp_path),
+                      MAIL_DEPARTMENT_ADDRESS='stages@esp.sn')
+    response = client.post('/submit', data=_submission(company_name='Sonatel\r\nSA'))
+    assert response.status_code == 302
+
+    assert run_pending() == 3
+    assert Job.query.filter(Job.status != 'done').count() == 0
+    messages = {message['To']: message for message in smtp_server.messages}
+    assert sorted(messages) == ['rh@sonatel.sn', 'stages@esp.sn']
+    assert messages['stages@esp.sn']['Subject'] == 'Nouvelle fiche de stage : Sonatel SA'
+
+def test_refused_smtp_connection_retries_job(app):
+    """Test that an unreachable SMTP server leaves the email job pending for a retry."""
+    import socket
+    from jobs import enqueue, run_pending
+
+    # A port nothing listens on: bound once, then released
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    app.config.update(MAIL_BACKEND='smtp', MAIL_SERVER='127.0.0.1', MAIL_PORT=port,
+                      MAIL_USE_TLS=False, MAIL_USERNAME=None)
+    form = _create_forms(1)[0]
+    job = enqueue('confirm_submission', form_id=form.id)
+    db.session.commit()
+
+    assert run_pending() == 1
+    db.session.refresh(job)
+    assert job.status == 'pending' and job.attempts == 1
+    assert 'cannot send email' in job.last_error
+
+def test_minifiers_keep_strings_and_regexes():
+    """Test that minification drops comments and whitespace but not literals."""
+    from assets import minify_css, minify_js
+
+    css = 'a :hover , b > c {\n  color : red ; /* note */\n  content: " /* kept */ ";\n}\n'
+    assert minify_css(css) == 'a :hover,b>c{color :red;content:" /* kept */ "}'
+
+    js = "// header\nconst re = /[/'\"]+/g; // trailing\nconst url = 'http://x'; /* block */\n\n  f(a / b);\n"
+    assert minify_js(js) == "const re = /[/'\"]+/g;\nconst url = 'http://x';\nf(a / b);"
+    template = "  const t = `a\n    b\n\nc`;  \n\n  g(`${x}`, 'y')  // z\n"
+    assert minify_js(template) == "const t = `a\n    b\n\nc`;\ng(`${x}`, 'y')"
+
+def test_assets_build_and_immutable_serving(app, client, tmp_path):
+    """Test fingerprinted assets, their precompressed variants and cache headers."""
+    import gzip
+    from assets import build_assets, load_manifest
+
+    manifest = build_assets(app.static_folder, str(tmp_path))
+    built_css = manifest['css/style.css']
+    assert built_css.startswith('css/style.') and built_css != 'css/style.css'
+    assert (tmp_path / (built_css + '.gz')).exists()
+    assert 'js/scripts.js' in manifest and 'images/logo.png' in manifest
+
+    app.config.update(ASSETS_DIR=str(tmp_path), ASSETS_USE_MANIFEST=True)
+    load_manifest(app)
+    page = client.get('/').get_data(as_text=True)
+    assert f'/assets/{built_css}' in page
+    assert '/static/css/style.css' not in page
+
+    response = client.get(f'/assets/{built_css}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data) == (tmp_path / built_css).read_bytes()
+
+    plain = client.get(f'/assets/{built_css}')
+    assert 'Content-Encoding' not in plain.headers
+    assert client.get('/assets/css/missing.css').status_code == 404
+
+def _stats_snapshot():
+    from models import WeeklyFormStats, CompanyFormStats
+
+    weeks = sorted((r.week_start, r.submissions, r.positions, r.wants_meeting, r.cannot_accept)
+                   for r in WeeklyFormStats.query)
+    companies = sorted((r.company_name, r.submissions, r.positions) for r in CompanyFormStats.query)
+    return weeks, companies
+
+def test_stats_maintained_incrementally(app):
+    """Test that inserts, updates and deletes keep the counters equal to a rebuild."""
+    from stats import dashboard, rebuild_stats
+
+    forms = _create_forms(3, start=datetime.datetime(2024, 1, 1))
+    forms[0].internship_positions = 4
+    forms[1].wants_meeting = True
+    forms[2].company_name = forms[0].company_name
+    db.session.commit()
+
+    db.session.expire_all()
+    forms[1].created_at = datetime.datetime(2024, 1, 10)
+    forms[1].internship_positions = 2
+    db.session.delete(forms[2])
+    db.session.commit()
+
+    incremental = _stats_snapshot()
+    assert incremental == (
+        [(datetime.date(2024, 1, 1), 1, 4, 0, 0), (datetime.date(2024, 1, 8), 1, 2, 1, 0)],
+        [('Company 000', 1, 4), ('Company 001', 1, 2)],
+    )
+    assert rebuild_stats() == 2
+    assert _stats_snapshot() == incremental
+
+    figures = dashboard(weeks=2, today=datetime.date(2024, 1, 12))
+    assert figures['totals']['submissions'] == 2
+    assert figures['totals']['positions'] == 6
+    assert figures['totals']['wants_meeting_share'] == 0.5
+    assert [week['submissions'] for week in figures['weeks']] == [1, 1]
+
+def test_stats_counts_imports_and_serves_dashboard(client):
+    """Test that bulk imports update the statistics shown on /stats."""
+    import io
+    import json
+    from importer import import_forms
+
+    records = [_import_record(i, company_name='Orange', internship_positions=3) for i in range(2)]
+    with client.application.app_context():
+        import_forms(io.StringIO(json.dumps(records)), 'json')
+
+    data = client.get('/stats.json').get_json()
+    assert data['totals']['submissions'] == 2
+    assert data['top_companies'][0] == {'company_name': 'Orange', 'submissions': 2, 'positions': 6}
+
+    page = client.get('/stats')
+    assert page.status_code == 200
+    assert 'Orange' in page.get_data(as_text=True)
+
+def test_api_fetches_many_ids_with_sparse_fields(client):
+    """Test batched reads by id and that only the requested columns are selected."""
+    from sqlalchemy import event
+
+    with client.application.app_context():
+        ids = [form.id for form in _create_forms(3)]
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = client.get(f'/api/v1/forms?ids={ids[2]},{ids[0]},999999&fields=company_name')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert response.get_json() == {
+        'data': [{'id': ids[2], 'company_name': 'Company 002'},
+                 {'id': ids[0], 'company_name': 'Company 000'}],
+        'missing': [999999],
+    }
+    select_sql = next(s for s in statements if 'FROM internship_forms' in s)
+    assert 'contact_email' not in select_sql
+
+    assert client.get(f'/api/v1/forms/{ids[1]}?fields=contact_name').get_json() == {
+        'data': {'id': ids[1], 'contact_name': 'John Doe'}
+    }
+    assert client.get('/api/v1/forms/999999').status_code == 404
+    assert client.get('/api/v1/forms?fields=password').status_code == 400
+    assert client.get('/api/v1/forms?ids=1,x').status_code == 400
+
+def test_api_keyset_pagination_and_gzip(client):
+    """Test walking the API with cursors and gzip-compressed responses."""
+    import gzip
+    import json
+
+    with client.application.app_context():
+        _create_forms(5)
+
+    seen, url = [], '/api/v1/forms?limit=2&fields=company_name'
+    while url:
+        body = client.get(url).get_json()
+        seen.extend(item['company_name'] for item in body['data'])
+        url = body['next']
+    assert seen == [f'Company {i:03d}' for i in range(4, -1, -1)]
+    assert client.get('/api/v1/forms?after=garbage').status_code == 400
+
+    response = client.get('/api/v1/forms', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(response.data))['data']) == 5
+    assert 'Content-Encoding' not in client.get('/api/v1/forms').headers
+
+def _submission(**overrides):
+    data = {
+        'company_name': 'Sonatel SA',
+        'company_address': '46 Boulevard de la République',
+        'contact_phone': '338391200',
+        'contact_email': 'rh@sonatel.sn',
+        'contact_name': 'Awa Ndiaye',
+        'contact_position': 'DRH',
+        'internship_positions': '2',
+        'internship_topic1': 'Réseaux',
+        'internship_topic2': 'Développement web',
+    }
+    data.update(overrides)
+    return data
+
+def test_replayed_submission_token_creates_one_form(client):
+    """Test that a double-clicked submission is only saved once."""
+    token = 'a' * 32
+    first = client.post('/submit', data=_submission(submission_token=token))
+    second = client.post('/submit', data=_submission(submission_token=token, company_name='Autre'))
+    assert first.headers['Location'] == second.headers['Location']
+    with client.application.app_context():
+        assert InternshipForm.query.count() == 1
+    assert 'name="submission_token"' in client.get('/').get_data(as_text=True)
+
+def test_resubmitted_duplicate_leaves_existing_form_unchanged(client):
+    """Test that a lookalike resubmission is redirected to the recent form without changing it."""
+    client.post('/submit', data=_submission())
+    response = client.post('/submit', data=_submission(
+        company_name='  SONATEL ', contact_email='RH@sonatel.sn', internship_positions='5',
+        internship_topic1='developpement Web', internship_topic2='reseaux', contact_name='Mallory'
+    ), follow_redirects=True)
+    assert 'pas été modifiée' in response.get_data(as_text=True)
+    with client.application.app_context():
+        form = InternshipForm.query.one()
+        assert form.internship_positions == 2 and form.contact_name == 'Awa Ndiaye'
+
+    client.post('/submit', data=_submission(internship_topic2='Data engineering'))
+    with client.application.app_context():
+        assert InternshipForm.query.count() == 2
+
+def test_resubmitted_duplicate_updates_only_pending_forms_when_enabled(client):
+    """Test that DUPLICATE_UPDATES_PENDING replaces unreviewed forms, with an audit entry."""
+    from models import FormReview
+    from review import review_forms
+
+    client.application.config['DUPLICATE_UPDATES_PENDING'] = True
+    client.post('/submit', data=_submission())
+    client.post('/submit', data=_submission(internship_positions='5'))
+    with client.application.app_context():
+        form = InternshipForm.query.one()
+        assert form.internship_positions == 5
+        assert [review.action for review in FormReview.query] == ['resubmit']
+        review_forms([form.id], 'approve', 'Relecteur')
+
+    client.post('/submit', data=_submission(contact_name='Mallory'))
+    with client.application.app_context():
+        form = InternshipForm.query.one()
+        assert form.contact_name == 'Awa Ndiaye' and form.is_approved is True
+
+def test_dedupe_command_groups_existing_rows(app, runner):
+    """Test the batch dedupe command on rows saved without a duplicate key."""
+    rows = [
+        {'company_name': name, 'company_address': '1 Rue X', 'contact_phone': '338250000',
+         'contact_email': 'rh@example.com', 'contact_name': 'Awa', 'contact_position': 'DRH',
+         'internship_topic1': 'Réseaux', 'created_at': datetime.datetime(2024, 1, day)}
+        for day, name in ((1, 'Expresso'), (2, 'EXPRESSO SARL'), (3, 'Free'), (4, 'expresso'))
+    ]
+    db.session.execute(InternshipForm.__table__.insert(), rows)
+    db.session.commit()
+
+    result = runner.invoke(args=['dedupe-forms'])
+    assert 'Computed the duplicate key of 4 forms.' in result.output
+    assert '2 duplicates in 1 groups.' in result.output
+
+    result = runner.invoke(args=['dedupe-forms', '--delete'])
+    assert '2 duplicates deleted.' in result.output
+    assert sorted(form.company_name for form in InternshipForm.query) == ['Expresso', 'Free']
+
+def test_dedupe_command_keeps_yearly_and_reviewed_forms(app, runner):
+    """Test that only forms within the window are duplicates and reviewed forms survive."""
+    def form(year, month, reviewed=False):
+        return InternshipForm(**{
+            'company_name': 'Sonatel', 'company_address': '1 Rue X', 'contact_phone': '338250000',
+            'contact_email': 'rh@sonatel.sn', 'contact_name': 'Awa', 'contact_position': 'DRH',
+            'created_at': datetime.datetime(year, month, 1),
+            'is_approved': reviewed, 'reviewed_at': datetime.datetime(year, month, 2) if reviewed else None,
+        })
+
+    yearly = [form(2022, 3, True), form(2023, 3, True)]
+    pending, reviewed = form(2024, 3), form(2024, 3, True)
+    reviewed.created_at += datetime.timedelta(days=10)
+    db.session.add_all(yearly + [pending, reviewed])
+    db.session.commit()
+
+    result = runner.invoke(args=['dedupe-forms', '--delete'])
+    assert f'form {reviewed.id} duplicated by {pending.id}' in result.output
+    assert '1 duplicates deleted.' in result.output
+    assert {f.id for f in InternshipForm.query} == {yearly[0].id, yearly[1].id, reviewed.id}
+
+def test_create_app_skips_schema_work(monkeypatch):
+    """Test that create_app never opens the database when AUTO_CREATE_SCHEMA is off."""
+    from config import config_by_name
+
+    monkeypatch.setattr(config_by_name['testing'], 'SQLALCHEMY_DATABASE_URI',
+                        'sqlite:////nonexistent-directory/forms.db')
+    app = create_app('testing')
+    assert app.config['AUTO_CREATE_SCHEMA'] is False
+
+def test_import_defers_heavy_modules():
+    """Test that importing the app does not load mail, PDF or spreadsheet modules."""
+    import subprocess
+    import sys
+
+    script = ('import sys, app; '
+              "print(','.join(m for m in ('mail', 'pdf', 'smtplib', 'openpyxl', 'cProfile') "
+              'if m in sys.modules))')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run([sys.executable, '-c', script], cwd=root,
+                               capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == ''
+
+def test_postgresql_configuration():
+    """Test PostgreSQL URL normalization and connection options."""
+    from config import database_url
+    from database import engine_options
+
+    assert database_url('postgres://u:p@db/forms') == 'postgresql://u:p@db/forms'
+    assert database_url('sqlite:///forms.db') == 'sqlite:///forms.db'
+    assert database_url('') is None
+
+    options = engine_options({'SQLALCHEMY_DATABASE_URI': 'postgresql://u:p@db/forms',
+                              'POSTGRES_STATEMENT_TIMEOUT': 5000})
+    assert options['pool_size'] == 5
+    assert options['connect_args']['connect_timeout'] == 10
+    assert options['connect_args']['options'] == '-c statement_timeout=5000'
+
+def test_copy_rows_payload_and_fallback(app):
+    """Test the COPY CSV encoding, its column defaults and the INSERT fallback."""
+    from database import copy_payload, copy_rows, format_copy_rows
+    from models import PENDING_REVIEW
+
+    payload = format_copy_rows(
+        ['company_name', 'internship_positions', 'wants_meeting', 'created_at', 'company_fax'],
+        [{'company_name': 'Say "Hi", SA\nDakar', 'internship_positions': 3, 'wants_meeting': True,
+          'created_at': datetime.datetime(2024, 5, 1, 8, 30), 'company_fax': None}]
+    )
+    assert payload == '"Say ""Hi"", SA\nDakar",3,t,"2024-05-01 08:30:00",\\N\n'
+
+    rows = [{'company_name': f'Copied {i}', 'company_address': 'Dakar', 'contact_phone': '33',
+             'contact_email': f'copy{i}@example.com', 'contact_name': 'Awa', 'contact_position': 'DRH',
+             'created_at': datetime.datetime(2024, 1, 1), 'updated_at': datetime.datetime(2024, 1, 1)}
+            for i in range(3)]
+    columns, payload = copy_payload(InternshipForm.__table__, rows[:1])
+    values = dict(zip(columns, payload.rstrip('\n').split(',')))
+    assert values['is_approved'] == 'f' and values['wants_meeting'] == 'f'
+    assert 'contact_fax' not in values and 'id' not in values
+
+    # COPY itself when TEST_DATABASE_URL selects PostgreSQL, the INSERT otherwise
+    copy_rows(db.session.connection(), InternshipForm.__table__, rows)
+    db.session.commit()
+    assert InternshipForm.query.count() == 3
+    assert InternshipForm.query.filter(PENDING_REVIEW).count() == 3
+
+def test_like_search_used_without_fts(app):
+    """Test the LIKE search used by backends without FTS5, such as PostgreSQL."""
+    from search import _search_forms_like
+
+    _create_forms(3)
+    assert [f.company_name for f in _search_forms_like('company 002', 10)] == ['Company 002']
+    assert len(_search_forms_like('COMPANY', 10)) == 3
+
+def test_bulk_review_updates_audits_and_invalidates(client):
+    """Test that one UPDATE reviews many forms, with audit rows and fresh ETags."""
+    from models import FormReview
+    from review import review_forms, review_queue
+
+    with client.application.app_context():
+        forms = _create_forms(4)
+        ids = [form.id for form in forms]
+    etag = client.get(f'/forms/{ids[0]}').headers['ETag']
+
+    with client.application.app_context():
+        assert review_forms(ids[:3], 'approve', 'Awa', 'ok') == ids[:3]
+        assert review_forms(ids[:3], 'approve', 'Awa') == []
+        assert review_forms([ids[2], 999], 'reject', 'Moussa') == [ids[2]]
+        assert [form.id for form in review_queue()] == [ids[3]]
+        assert FormReview.query.count() == 4
+
+    response = client.get(f'/forms/{ids[0]}')
+    assert response.headers['ETag'] != etag
+    assert 'Approuvé' in response.get_data(as_text=True)
+    assert 'Rejeté' in client.get(f'/forms/{ids[2]}').get_data(as_text=True)
+
+def test_review_queue_requires_login_and_applies_decisions(client):
+    """Test the reviewer login and a bulk decision from the queue page."""
+    client.application.config['ADMIN_TOKEN'] = 'secret'
+    with client.application.app_context():
+        ids = [form.id for form in _create_forms(3)]
+
+    response = client.get('/admin/review')
+    assert response.status_code == 302 and '/admin/login' in response.headers['Location']
+    client.post('/admin/login', data={'reviewer': 'Awa', 'token': 'wrong'})
+    assert client.get('/admin/review').status_code == 302
+    assert client.post('/admin/login', data={'reviewer': 'Awa', 'token': 'sécret'}).status_code == 200
+
+    client.post('/admin/login', data={'reviewer': 'Awa', 'token': 'secret'})
+    assert '3 fiche(s) en attente' in client.get('/admin/review').get_data(as_text=True)
+
+    response = client.post('/admin/review', data={'form_ids': ids[:2], 'reject': 'y'},
+                           follow_redirects=True)
+    assert '2 fiche(s) rejetée(s).' in response.get_data(as_text=True)
+    assert '1 fiche(s) en attente' in response.get_data(as_text=True)
+
+def test_review_api(client):
+    """Test the token-protected bulk review endpoint and the audit trail."""
+    client.application.config['ADMIN_TOKEN'] = 'secret'
+    headers = {'Authorization': 'Bearer secret'}
+    with client.application.app_context():
+        ids = [form.id for form in _create_forms(2)]
+
+    assert client.post('/api/v1/forms/review', json={'ids': ids, 'action': 'approve'}).status_code == 401
+    response = client.post('/api/v1/forms/review', headers=headers,
+                           json={'ids': ids, 'action': 'maybe'})
+    assert response.status_code == 400
+
+    response = client.post('/api/v1/forms/review', headers=headers,
+                           json={'ids': ids, 'action': 'approve', 'reviewer': 'Awa'})
+    assert response.get_json() == {'action': 'approve', 'changed': ids}
+
+    trail = client.get(f'/api/v1/forms/{ids[0]}/reviews', headers=headers).get_json()['data']
+    assert [(r['action'], r['reviewer']) for r in trail] == [('approve', 'Awa')]
+
+@sqlite_only
+def test_review_queue_uses_index(app):
+    """Test that a queue page is read from the review queue index."""
+    from review import review_queue
+
+    query = review_queue().order_by(InternshipForm.created_at.desc(), InternshipForm.id.desc()).limit(51)
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    plan = ' '.join(row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')))
+    assert 'ix_internship_forms_review_queue' in plan and 'TEMP B-TREE' not in plan
+
+def test_token_buckets_refill_and_share_state(tmp_path, monkeypatch):
+    """Test bucket arithmetic and that the sqlite storage is shared by workers."""
+    import ratelimit
+    from ratelimit import MemoryBuckets, SQLiteBuckets, parse_rate
+
+    assert parse_rate('10/600') == (10, 600.0)
+    clock = [1000.0]
+    monkeypatch.setattr(ratelimit.time, 'monotonic', lambda: clock[0])
+    buckets = MemoryBuckets()
+    assert buckets.take('a', 2, 60) == (True, 0.0)
+    assert buckets.take('a', 2, 60) == (True, 0.0)
+    assert buckets.take('a', 2, 60) == (False, 30.0)
+    clock[0] += 30
+    assert buckets.take('a', 2, 60)[0] is True
+    assert buckets.take('b', 2, 60)[0] is True
+
+    path = str(tmp_path / 'ratelimit.db')
+    first, second = SQLiteBuckets(path), SQLiteBuckets(path)
+    assert first.take('ip', 1, 60)[0] is True
+    allowed, retry_after = second.take('ip', 1, 60)
+    assert allowed is False and 59 < retry_after <= 60
+
+def test_submit_rate_limited_per_ip_and_globally(app, monkeypatch):
+    """Test that /submit answers 429 with Retry-After beyond either limit."""
+    from config import config_by_name
+
+    testing = config_by_name['testing']
+    monkeypatch.setattr(testing, 'RATELIMIT_ENABLED', True)
+    monkeypatch.setattr(testing, 'RATELIMIT_SUBMIT_PER_IP', '2/60')
+    monkeypatch.setattr(testing, 'RATELIMIT_SUBMIT_GLOBAL', '3/60')
+    monkeypatch.setattr(testing, 'INSTRUMENTATION_ENABLED', True, raising=False)
+    limited = create_app('testing')
+    limited.config.from_object(TestConfig)
+    client = limited.test_client()
+
+    def submit(address):
+        return client.post('/submit', data={}, environ_base={'REMOTE_ADDR': address})
+
+    assert submit('10.0.0.1').status_code == 200
+    assert submit('10.0.0.1').status_code == 200
+    response = submit('10.0.0.1')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+    assert 'Trop de Requêtes' in response.get_data(as_text=True)
+
+    assert submit('10.0.0.2').status_code == 200
+    assert submit('10.0.0.3').status_code == 429
+    assert client.get('/').status_code == 200
+
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert 'ratelimit_requests_total{limit="submit",scope="all",outcome="allowed"} 3' in metrics
+    assert 'ratelimit_requests_total{limit="submit",scope="ip",outcome="limited"} 1' in metrics
+    assert 'ratelimit_requests_total{limit="submit",scope="all",outcome="limited"} 1' in metrics
+
+def test_list_cards_escape_and_link(client):
+    """Test that precomputed cards are escaped once and link to the detail page."""
+    client.post('/submit', data=_submission(company_name='<b>Durand & Fils</b>'))
+    with client.application.app_context():
+        form_id = InternshipForm.query.one().id
+    html = client.get('/forms').get_data(as_text=True)
+    assert '&lt;b&gt;Durand &amp; Fils&lt;/b&gt;' in html
+    assert '<b>Durand' not in html and '&amp;amp;' not in html
+    assert f'href="/forms/{form_id}"' in html
+    assert 'Soumis le:' in html
+
+def test_templates_compile_fills_bytecode_cache(app, tmp_path):
+    """Test that templates-compile writes the cache and refuses when it is disabled."""
+    from templating import init_templates
+
+    result = app.test_cli_runner().invoke(args=['templates-compile'])
+    assert result.exit_code != 0 and 'disabled' in result.output
+
+    app.config.update(TEMPLATE_BYTECODE_CACHE=True, TEMPLATE_CACHE_DIR=str(tmp_path))
+    init_templates(app)
+    result = app.test_cli_runner().invoke(args=['templates-compile'])
+    assert result.exit_code == 0, result.output
+    assert 'templates compiled' in result.output
+    assert len(list(tmp_path.iterdir())) >= len(app.jinja_env.list_templates(extensions=['html']))
+
+def test_archive_moves_old_forms_and_keeps_them_readable(client, tmp_path):
+    """Test that archived forms leave the table but stay viewable, searchable and counted."""
+    import gzip
+    import json
+    from archive import archive_forms, compact_database
+    from models import ArchivedForm, WeeklyFormStats
+    from stats import rebuild_stats
+
+    app = client.application
+    app.config['ARCHIVE_DIR'] = str(tmp_path)
+    with app.app_context():
+        for created_at, company in ((datetime.datetime(2020, 3, 1), 'Orange Ancien'),
+                                    (datetime.datetime(2021, 6, 1), 'Expresso'),
+                                    (datetime.datetime.utcnow(), 'Wave')):
+            values = _submission(company_name=company, internship_positions=2)
+            db.session.add(InternshipForm(created_at=created_at, **values))
+        db.session.commit()
+        old_id = InternshipForm.query.filter_by(company_name='Orange Ancien').one().id
+        rebuild_stats()
+        counted = db.session.query(db.func.sum(WeeklyFormStats.submissions)).scalar()
+
+        assert archive_forms(datetime.datetime(2022, 1, 1), batch_size=1) == {2020: 1, 2021: 1}
+        assert archive_forms(datetime.datetime(2022, 1, 1)) == {}
+        compact_database()
+        assert [form.company_name for form in InternshipForm.query] == ['Wave']
+        assert ArchivedForm.query.count() == 2
+        with gzip.open(tmp_path / 'forms-2020.jsonl.gz', 'rt', encoding='utf-8') as handle:
+            assert json.loads(handle.read())['company_name'] == 'Orange Ancien'
+
+        assert rebuild_stats() == 3
+        assert db.session.query(db.func.sum(WeeklyFormStats.submissions)).scalar() == counted
+
+    response = client.get(f'/forms/{old_id}')
+    assert response.status_code == 200
+    assert 'Orange Ancien' in response.get_data(as_text=True)
+    assert 'Orange Ancien' in client.get('/forms?q=orange').get_data(as_text=True)
+    assert client.get('/forms/search?q=expresso').get_json()['results'][0]['company_name'] == 'Expresso'
+    assert 'Orange Ancien' not in client.get('/forms').get_data(as_text=True)
+
+def test_archive_command(app, runner, tmp_path):
+    """Test that archive-forms honours --before and reports the archived years."""
+    app.config['ARCHIVE_DIR'] = str(tmp_path)
+    db.session.add(InternshipForm(created_at=datetime.datetime(2019, 9, 1), **_submission(internship_positions=1)))
+    db.session.commit()
+
+    result = runner.invoke(args=['archive-forms', '--before', '2019-01-01'])
+    assert '0 forms submitted before 2019-01-01' in result.output
+    result = runner.invoke(args=['archive-forms'])
+    assert result.exit_code == 0, result.output
+    assert '2019: 1 forms' in result.output and 'vacuumed' in result.output
+    assert (tmp_path / 'forms-2019.jsonl.gz').exists()
+    assert InternshipForm.query.count() == 0
+
+@sqlite_only
+def test_archived_ids_are_never_reused(client, tmp_path):
+    """Test that new forms never get the id of an archived one, also after upgrading a legacy table."""
+    from sqlalchemy import text
+    from archive import ArchiveError, archive_forms
+    from schema import reuses_form_ids, upgrade_schema
+    from search import FTS_DDL
+
+    app = client.application
+    app.config['ARCHIVE_DIR'] = str(tmp_path)
+    with app.app_context():
+        # A database created before AUTOINCREMENT was declared
+        with db.engine.begin() as connection:
+            sql = connection.execute(text("SELECT sql FROM sqlite_master WHERE name = 'internship_forms'")).scalar()
+            connection.execute(text('DROP TABLE internship_forms'))
+            connection.execute(text(sql.replace(' AUTOINCREMENT', '')))
+            for statement in FTS_DDL[1:]:
+                connection.execute(text(statement))
+        db.session.add(InternshipForm(created_at=datetime.datetime.utcnow(), **_submission(internship_positions=1)))
+        # A historical paper form imported last: newest id, oldest date
+        db.session.add(InternshipForm(created_at=datetime.datetime(2015, 9, 1),
+                                      **_submission(company_name='Papier', internship_positions=1)))
+        db.session.commit()
+        with pytest.raises(ArchiveError):
+            archive_forms(datetime.datetime(2020, 1, 1))
+
+        changes = upgrade_schema(analyze=False)
+        assert 'rebuild table internship_forms with AUTOINCREMENT ids' in changes
+        assert not reuses_form_ids(db.session.connection())
+        assert InternshipForm.query.count() == 2
+        assert archive_forms(datetime.datetime(2020, 1, 1)) == {2015: 1}
+        assert upgrade_schema(analyze=False) == []
+
+    client.post('/submit', data=_submission(company_name='Nouvelle', internship_topic1='Data'))
+    with app.app_context():
+        assert InternshipForm.query.filter_by(company_name='Nouvelle').one().id == 3
+        assert 'Nouvelle' in client.get('/forms?q=nouvelle').get_data(as_text=True)
+    assert 'Papier' in client.get('/forms/2').get_data(as_text=True)
@@ -0,0 +1,27 @@
+import os
+from flask import Flask
+from database import init_database
+from config import config_by_name
+from schema import upgrade_schema
+
+def upgrade_database():
+    """Apply missing tables, columns and indexes without dropping any data."""
+    app = Flask(__name__)
+
+    # Load configuration
+    app.config.from_object(config_by_name[os.environ.get('FLASK_ENV', 'development')])
+
+    # Initialize database with app
+    init_database(app)
+
+    with app.app_context():
+        print("Upgrading database schema...")
+        changes = upgrade_schema()
+
+        for change in changes:
+            print(f"  - {change}")
+
+        print("Database upgrade complete!" if changes else "Database schema already up to date.")
+
+if __name__ == "__main__":
+    upgrade_database()
@@ -0,0 +1,15 @@
+"""WSGI entry point for production servers.
+
+Run with:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import os
+
+from app import create_app
+
+if not os.environ.get('SECRET_KEY'):
+    # Without a shared key every worker signs sessions and CSRF tokens with
+    # its own random key, and form posts fail whenever they reach another worker.
+    raise RuntimeError('SECRET_KEY must be set when serving with multiple workers')
+
+app = create_app(os.environ.get('FLASK_ENV', 'production'))